@@ -5,7 +5,6 @@ from pathlib import Path
 
 import streamlit as st
 import pandas as pd
-from google import genai
 
 # Ensure local `src` imports resolve when launched via `streamlit run app/streamlit_app.py`.
 ROOT = Path(__file__).resolve().parents[1]
@@ -14,25 +13,90 @@ if str(ROOT) not in sys.path:
 
 from src.config import get_settings
 from src.data_loader import load_restaurants
+from src.index_registry import IndexNotReadyError, read_index_version
 from src.nlp import parse_query
+from src.profiling import profile_request
 from src.retriever import retrieve
 
 st.set_page_config(page_title="AI Food Recommender", layout="centered")
 st.title("🍽️ AI Food Recommender (Gemini + ChromaDB)")
 
 settings = get_settings()
-gemini_client = genai.Client(api_key=settings.google_api_key)
+
+@st.cache_resource
+def get_gemini_client():
+    ## google.genai is imported on the first query, not at app start-up;
+    ## shared across sessions so the concurrency limit applies to the whole app ...
+    from src.llm_client import ResilientLLM, make_gemini_client
+
+    return ResilientLLM.from_settings(make_gemini_client(settings), settings)
 
 @st.cache_data
 def restaurants_df() -> pd.DataFrame:
     return load_restaurants("data/restaurants.json")
 
+@st.cache_resource
+def get_semantic_cache():
+    ## shared across sessions; only built when SEMANTIC_CACHE_THRESHOLD is set ...
+    if settings.semantic_cache_threshold is None:
+        return None
+    from src.semantic_cache import SemanticQueryCache
+
+    return SemanticQueryCache(threshold=settings.semantic_cache_threshold, max_entries=settings.semantic_cache_size)
+
 rdf = restaurants_df()
 
 known_restaurants = sorted(rdf["restaurant_name"].dropna().astype(str).unique().tolist())
 known_locations = sorted(rdf["location"].dropna().astype(str).unique().tolist())
 known_cuisines = sorted(rdf["cuisine_type"].dropna().astype(str).unique().tolist())
 
+@st.cache_resource
+def get_query_log():
+    ## anonymized local query log, only when QUERY_LOG_PATH is set ...
+    if not settings.query_log_path:
+        return None
+    from src.query_log import QueryLog
+
+    return QueryLog(settings.query_log_path)
+
+@st.cache_resource(show_spinner=False)
+def warm_caches(index_version):
+    ## once per process and published index version: replay the most frequent logged queries
+    ## so later requests hit a loaded model and filled parse / result caches. Runs in a background
+    ## thread (Gemini calls are sequential) so the first page load is not blocked ...
+    import threading
+
+    from src.query_log import top_queries
+    from src.warmup import warm_up
+
+    client = get_gemini_client()
+    thread = threading.Thread(
+        target=warm_up,
+        name="cache-warm-up",
+        daemon=True,
+        kwargs=dict(
+            entries=top_queries(settings.query_log_path, settings.warmup_top_n),
+            chroma_dir=settings.chroma_dir,
+            collection_name=settings.collection_name,
+            parse=lambda q: parse_query(
+                client=client,
+                model=settings.gemini_model,
+                query=q,
+                known_restaurants=known_restaurants,
+                known_locations=known_locations,
+                known_cuisines=known_cuisines,
+            ),
+            max_per_restaurant=settings.max_per_restaurant,
+            dedup_dishes=settings.dedup_dishes,
+            deadline_s=settings.warmup_deadline_s,
+        ),
+    )
+    thread.start()
+    return thread
+
+if settings.query_log_path and settings.warmup_top_n > 0:
+    warm_caches(read_index_version(settings.chroma_dir, settings.collection_name))
+
 with st.expander("✅ Example queries", expanded=True):
     st.code("I want a butter chicken in 30 mins")
     st.code("Order something spicy veg under 250 near Mumbai")
@@ -49,47 +113,75 @@ with c2:
 explain = st.toggle("Generate short LLM explanation", value=True)
 
 if st.button("Find best items"):
-    if not user_query.strip():
-        st.warning("Please enter a query.")
-        st.stop()
-
-    ### Parse the query with Gemini to extract filters
-    ### something like if any known restaurant or location or cuisine is mentioned in the query, 
-    # then use it to filter the result
-    with st.spinner("Parsing your query with Gemini..."):
-        parsed = parse_query(
-            client=gemini_client,
-            model=settings.gemini_model,
-            query=user_query.strip(),
-            known_restaurants=known_restaurants,
-            known_locations=known_locations,
-            known_cuisines=known_cuisines,
-        )
-
-    st.subheader("🧩 Extracted filters")
-    st.json(parsed.filters)
-
-    loc = None if location_override == "(auto from query)" else location_override
-
-    with st.spinner("Searching and ranking items..."):
-        recs = retrieve(
-            chroma_dir=settings.chroma_dir,
-            collection_name=settings.collection_name,
-            query_text=user_query.strip(),
-            filters=parsed.filters,
-            top_k=top_k,
-            candidate_k=max(30, top_k * 8),
-            user_location=loc,
-        )
-
-    if not recs:
-        st.error("No recommendations found. Try relaxing constraints or rebuilding the index.")
-        st.stop()
-
-    st.subheader("🍽️ Recommendations")
-    for r in recs:
-        st.markdown(
-            f"""
+    ## opt-in profiling: PROFILE_RATE samples requests, ?profile=1 forces it for this one ...
+    force_profile = st.query_params.get("profile") == "1"
+    with profile_request(
+        "recommend", force=force_profile, rate=settings.profile_rate, out_dir=settings.profile_dir
+    ) as request_profile:
+        if not user_query.strip():
+            st.warning("Please enter a query.")
+            st.stop()
+
+        ### Parse the query with Gemini to extract filters
+        ### something like if any known restaurant or location or cuisine is mentioned in the query, 
+        # then use it to filter the result
+        semantic_cache = get_semantic_cache()
+        query_embedding = None
+        if semantic_cache is not None:
+            from src.embeddings import embed_text
+
+            query_embedding = embed_text(user_query.strip())
+
+        with st.spinner("Parsing your query with Gemini..."):
+            parsed = parse_query(
+                client=get_gemini_client(),
+                model=settings.gemini_model,
+                query=user_query.strip(),
+                known_restaurants=known_restaurants,
+                known_locations=known_locations,
+                known_cuisines=known_cuisines,
+                semantic_cache=semantic_cache,
+                query_embedding=query_embedding,
+            )
+
+        st.subheader("🧩 Extracted filters")
+        if parsed.degraded:
+            st.info("Gemini is slow or unavailable right now, showing unfiltered results.")
+        st.json(parsed.filters)
+
+        loc = None if location_override == "(auto from query)" else location_override
+
+        query_log = get_query_log()
+        if query_log is not None:
+            query_log.record(user_query, filters=parsed.filters, location=loc, top_k=top_k)
+
+        with st.spinner("Searching and ranking items..."):
+            try:
+                recs = retrieve(
+                    chroma_dir=settings.chroma_dir,
+                    collection_name=settings.collection_name,
+                    query_text=user_query.strip(),
+                    filters=parsed.filters,
+                    top_k=top_k,
+                    candidate_k=max(100, top_k * 20),  # upper bound; retrieval stops early
+                    user_location=loc,
+                    query_embedding=query_embedding,
+                    semantic_cache=semantic_cache,
+                    max_per_restaurant=settings.max_per_restaurant,
+                    dedup_dishes=settings.dedup_dishes,
+                )
+            except IndexNotReadyError as e:
+                st.error(str(e))
+                st.stop()
+
+        if not recs:
+            st.error("No recommendations found. Try relaxing constraints or rebuilding the index.")
+            st.stop()
+
+        st.subheader("🍽️ Recommendations")
+        for r in recs:
+            st.markdown(
+                f"""
 **{r.item_name}**  
 Restaurant: **{r.restaurant_name}** ({r.cuisine_type})  
 City: {r.location} • ETA: **{r.delivery_time_minutes} min**  
@@ -99,14 +191,14 @@ Similarity: {r.similarity:.3f} • Final score: {r.final_score:.3f}
 Tags: {", ".join(r.reason_tags) if r.reason_tags else "-"}
 ---
 """
-        )
-
-    if explain:
-        with st.spinner("Generating explanation..."):
-            formatted = "\n".join(
-                [f"- {r.item_name} from {r.restaurant_name} (₹{int(r.price)}, ETA {r.delivery_time_minutes}m)" for r in recs]
             )
-            prompt = f"""User request:
+
+        if explain:
+            with st.spinner("Generating explanation..."):
+                formatted = "\n".join(
+                    [f"- {r.item_name} from {r.restaurant_name} (₹{int(r.price)}, ETA {r.delivery_time_minutes}m)" for r in recs]
+                )
+                prompt = f"""User request:
 {user_query}
 
 Top recommended items:
@@ -114,6 +206,17 @@ Top recommended items:
 
 In 2-4 sentences, explain why these items match the request. Keep it concise.
 """
-            resp = gemini_client.models.generate_content(model=settings.gemini_model, contents=prompt)
-            st.subheader("🤖 Explanation")
-            st.write((resp.text or "").strip())
+                from src.llm_client import LLMUnavailableError
+
+                try:
+                    resp = get_gemini_client().models.generate_content(model=settings.gemini_model, contents=prompt)
+                except LLMUnavailableError:
+                    ## the explanation is optional, the recommendations are already on screen ...
+                    st.caption("Explanation unavailable right now.")
+                else:
+                    st.subheader("🤖 Explanation")
+                    st.write((resp.text or "").strip())
+
+    if force_profile and request_profile.sampled:
+        with st.expander(f"⏱️ Profile ({request_profile.wall_s * 1000:.0f} ms) - {request_profile.path}"):
+            st.code(request_profile.summary)
@@ -1,9 +1,9 @@
 import json
+import os
 import numpy as np
 import pandas as pd
 import streamlit as st
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 from google import genai
 
 # =====================================================
@@ -37,15 +37,52 @@ embedding_model = load_embedding_model()
 # 4️⃣ Load Dataset (Cached)
 # =====================================================
 
-@st.cache_data
+PICKLE_PATH = "menu_with_embeddings_local.pkl"
+EMBEDDINGS_PATH = "menu_embeddings.npy"
+METADATA_PATH = "menu_metadata.pkl"
+
+def convert_pickle():
+    # Conversion: object column of embeddings -> contiguous, L2-normalized float32 matrix
+    df = pd.read_pickle(PICKLE_PATH)
+    emb = np.ascontiguousarray(np.vstack(df["embedding"].values), dtype=np.float32)
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+
+    # Written to temp files and swapped in with os.replace, so other workers never read half a file
+    tmp_emb = f"{EMBEDDINGS_PATH}.{os.getpid()}.tmp.npy"
+    tmp_meta = f"{METADATA_PATH}.{os.getpid()}.tmp"
+    np.save(tmp_emb, emb / norms)
+    df.drop(columns=["embedding"]).reset_index(drop=True).to_pickle(tmp_meta)
+    os.replace(tmp_meta, METADATA_PATH)
+    os.replace(tmp_emb, EMBEDDINGS_PATH)
+
+def needs_conversion():
+    # Missing, or older than the source pickle (an updated .pkl must not be ignored)
+    if not (os.path.exists(EMBEDDINGS_PATH) and os.path.exists(METADATA_PATH)):
+        return True
+    if not os.path.exists(PICKLE_PATH):
+        return False
+    source_mtime = os.path.getmtime(PICKLE_PATH)
+    return any(os.path.getmtime(p) < source_mtime for p in (EMBEDDINGS_PATH, METADATA_PATH))
+
+@st.cache_resource
 def load_data():
-    restaurants_df = pd.read_json("restaurants.json")
-    menu_df = pd.read_json("menu.json")
-    df = menu_df.merge(restaurants_df, on="restaurant_id", how="left")
-    df = pd.read_pickle("menu_with_embeddings_local.pkl")
-    return df
+    if needs_conversion():
+        convert_pickle()
+
+    df = pd.read_pickle(METADATA_PATH)
+    # Memory-mapped: pages are shared across processes and loaded lazily
+    embeddings = np.load(EMBEDDINGS_PATH, mmap_mode="r")
+
+    # Filter columns as plain arrays, evaluated with vectorized masks per query
+    columns = {
+        "veg": df["veg"].to_numpy(),
+        "spice_level": df["spice_level"].astype(str).to_numpy(),
+        "price": df["price"].to_numpy(dtype=np.float64),
+    }
+    return df, embeddings, columns
 
-df = load_data()
+df, item_embeddings, filter_columns = load_data()
 
 # =====================================================
 # 5️⃣ Gemini: Rewrite + Extract (Single Call)
@@ -128,41 +165,34 @@ def recommend(query, top_k=5):
 
     rewritten_query, filters = rewrite_and_extract(query)
 
-    filtered_df = df.copy()
+    # Structured filtering as a boolean mask (no DataFrame copies)
+    mask = np.ones(len(df), dtype=bool)
 
-    # Structured filtering
     if filters.get("veg") is not None:
-        filtered_df = filtered_df[filtered_df["veg"] == filters["veg"]]
+        mask &= filter_columns["veg"] == filters["veg"]
 
     if filters.get("spice_level"):
-        filtered_df = filtered_df[
-            filtered_df["spice_level"] == filters["spice_level"]
-        ]
+        mask &= filter_columns["spice_level"] == filters["spice_level"]
 
     if filters.get("max_price"):
-        filtered_df = filtered_df[
-            filtered_df["price"] <= filters["max_price"]
-        ]
-
-    if len(filtered_df) == 0:
-        filtered_df = df.copy()
+        mask &= filter_columns["price"] <= filters["max_price"]
 
-    # Semantic similarity ranking
-    query_embedding = embedding_model.encode([rewritten_query])[0]
-    item_embeddings = np.vstack(filtered_df["embedding"].values)
+    if not mask.any():
+        mask[:] = True
 
-    similarities = cosine_similarity(
-        [query_embedding],
-        item_embeddings
-    )[0]
+    # Semantic similarity ranking: one matrix-vector product over the normalized matrix
+    query_embedding = embedding_model.encode(
+        [rewritten_query], normalize_embeddings=True
+    )[0].astype(np.float32)
+    similarities = item_embeddings @ query_embedding
+    similarities = np.where(mask, similarities, -np.inf)
 
-    filtered_df = filtered_df.copy()
-    filtered_df["similarity"] = similarities
+    k = min(top_k, int(mask.sum()))
+    top = np.argpartition(-similarities, k - 1)[:k]
+    top = top[np.argsort(-similarities[top])]
 
-    ranked_df = filtered_df.sort_values(
-        by="similarity",
-        ascending=False
-    ).head(top_k)
+    ranked_df = df.iloc[top].copy()
+    ranked_df["similarity"] = similarities[top]
 
     explanation = generate_explanation(query, ranked_df)
 
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.config import get_settings
+from src.data_loader import load_restaurants
+from src.embeddings import embed_texts
+from src.nlp import ParsedQuery, parse_query
+from src.retriever import open_index, retrieve
+
+## Input: one JSON object per line, e.g.
+##   {"id": "q1", "query": "spicy veg under 250", "location": "Mumbai", "filters": {"max_price": 300}, "top_k": 10}
+## only "query" is required; "filters" are merged over (and win against) what Gemini extracts.
+## Queries whose retrieval fails go to `<output>.errors.jsonl` (input record + "line" + "error");
+## `--retry-failed` re-runs exactly those and keeps the ones that fail again.
+
+def read_queries(path: Path, skip: int = 0) -> Iterator[tuple[int, dict]]:
+    with open(path, encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh):
+            if lineno < skip or not line.strip():
+                continue
+            rec = json.loads(line)
+            rec.setdefault("id", str(lineno))
+            yield lineno, rec
+
+def chunked(it: Iterator, size: int) -> Iterator[list]:
+    chunk = []
+    for x in it:
+        chunk.append(x)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class JsonlWriter:
+    """Appends rows to a JSONL file; resumes by truncating to the last checkpointed size."""
+
+    def __init__(self, path: Path, resume_state: Optional[dict]) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.fh = open(path, "r+b" if resume_state and path.exists() else "wb")
+        if resume_state and path.exists():
+            ## rows written after the last checkpoint belong to a chunk that will be redone ...
+            self.fh.truncate(int(resume_state.get("output_bytes", 0)))
+            self.fh.seek(0, 2)
+
+    def write(self, rows: list[dict]) -> None:
+        for r in rows:
+            self.fh.write((json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8"))
+        self.fh.flush()
+
+    def state(self) -> dict:
+        return {"output_bytes": self.fh.tell()}
+
+    def close(self) -> None:
+        self.fh.close()
+
+class ParquetWriter:
+    """One part file per chunk under `<out>/`, so a crash never leaves a half-written file behind."""
+
+    def __init__(self, path: Path, resume_state: Optional[dict]) -> None:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow") from e
+        self.path = path
+        self.parts = int((resume_state or {}).get("parts", 0))
+        path.mkdir(parents=True, exist_ok=True)
+        for stale in path.glob("part-*.parquet"):
+            if int(stale.stem.split("-")[1]) >= self.parts:
+                stale.unlink()
+
+    def write(self, rows: list[dict]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not rows:
+            return
+        rows = [{**r, "filters": json.dumps(r.get("filters") or {})} for r in rows]
+        tmp = self.path / f".part-{self.parts:05d}.tmp"
+        pq.write_table(pa.Table.from_pylist(rows), tmp)
+        tmp.replace(self.path / f"part-{self.parts:05d}.parquet")
+        self.parts += 1
+
+    def state(self) -> dict:
+        return {"parts": self.parts}
+
+    def close(self) -> None:
+        pass
+
+def checkpoint_path(out: Path) -> Path:
+    return out.with_name(out.name + ".checkpoint.json")
+
+def errors_path(out: Path) -> Path:
+    return out.with_name(out.name + ".errors.jsonl")
+
+def load_checkpoint(out: Path) -> Optional[dict]:
+    p = checkpoint_path(out)
+    if not p.exists():
+        return None
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def save_checkpoint(out: Path, state: dict) -> None:
+    p = checkpoint_path(out)
+    tmp = p.with_name(f".{p.name}.tmp")
+    tmp.write_text(json.dumps(state), encoding="utf-8")
+    tmp.replace(p)
+
+def main() -> None:
+    root = Path(__file__).resolve().parents[1]
+
+    parser = argparse.ArgumentParser(description="Batch parse + retrieve queries from JSONL.")
+    parser.add_argument("input", type=Path, help="JSONL file with one query object per line")
+    parser.add_argument("output", type=Path, help="output .jsonl file or .parquet directory")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default=None,
+                        help="default: from the output suffix")
+    parser.add_argument("--workers", type=int, default=8, help="parallel parse / retrieve calls")
+    parser.add_argument("--chunk-size", type=int, default=256, help="queries per embed batch and checkpoint")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--no-llm", action="store_true", help="skip Gemini, use only the filters in the input")
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing checkpoint and start over")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="re-run only the queries recorded in <output>.errors.jsonl")
+    args = parser.parse_args()
+    ## Gemini (and its key) is only needed when queries are parsed ...
+    settings = get_settings(require_api_key=not args.no_llm)
+
+    fmt = args.format or ("parquet" if args.output.suffix == ".parquet" else "jsonl")
+    state = None if args.fresh else load_checkpoint(args.output)
+    if state and state.get("input") != str(args.input.resolve()):
+        raise SystemExit(f"Checkpoint {checkpoint_path(args.output)} belongs to {state.get('input')}; use --fresh.")
+
+    ## failures are recorded (and checkpointed) instead of being skipped silently; a retry pass reads
+    ## the errors file and writes what still fails to a side file that replaces it at the end ...
+    errors_file = errors_path(args.output)
+    if args.retry_failed:
+        if not state or not errors_file.exists():
+            raise SystemExit(f"Nothing to retry: no checkpoint or no {errors_file}.")
+        source = errors_file
+        failed_out = errors_file.with_name(errors_file.name + ".retry")
+        done_lines = int(state.get("retry_lines", 0))
+        err_state = {"output_bytes": state["retry_errors_bytes"]} if "retry_lines" in state else None
+    else:
+        source = args.input
+        failed_out = errors_file
+        done_lines = int((state or {}).get("lines", 0))
+        err_state = {"output_bytes": state.get("errors_bytes", 0)} if state else None
+    writer = (ParquetWriter if fmt == "parquet" else JsonlWriter)(args.output, state)
+    failed = JsonlWriter(failed_out, err_state)
+
+    llm = None
+    if not args.no_llm:
+        from src.llm_client import ResilientLLM, make_gemini_client
+
+        llm = ResilientLLM.from_settings(make_gemini_client(settings), settings)
+    rdf = load_restaurants(root / "data" / "restaurants.json")
+    known = {
+        "known_restaurants": sorted(rdf["restaurant_name"].dropna().astype(str).unique().tolist()),
+        "known_locations": sorted(rdf["location"].dropna().astype(str).unique().tolist()),
+        "known_cuisines": sorted(rdf["cuisine_type"].dropna().astype(str).unique().tolist()),
+    }
+
+    chroma_dir = str(root / settings.chroma_dir)
+    ## client start-up is not thread-safe: open the collection once before the pool fans out ...
+    open_index(chroma_dir, settings.collection_name)
+
+    def parse(rec: dict) -> ParsedQuery:
+        if llm is None:
+            parsed = ParsedQuery(filters={})
+        else:
+            parsed = parse_query(client=llm, model=settings.gemini_model, query=rec["query"], **known)
+        return ParsedQuery(filters={**parsed.filters, **(rec.get("filters") or {})}, degraded=parsed.degraded)
+
+    def recommend(job: tuple[dict, ParsedQuery, list[float]]) -> tuple[list[dict], Optional[str]]:
+        rec, parsed, emb = job
+        top_k = int(rec.get("top_k") or args.top_k)
+        try:
+            recs = retrieve(
+                chroma_dir=chroma_dir,
+                collection_name=settings.collection_name,
+                query_text=rec["query"],
+                filters=parsed.filters,
+                top_k=top_k,
+                candidate_k=max(100, top_k * 20),
+                user_location=rec.get("location"),
+                query_embedding=emb,
+                max_per_restaurant=settings.max_per_restaurant,
+                dedup_dishes=settings.dedup_dishes,
+            )
+        except Exception as e:
+            return [], f"{type(e).__name__}: {e}"
+        base = {"id": rec["id"], "query": rec["query"], "filters": parsed.filters, "degraded": parsed.degraded}
+        return [{**base, "rank": i + 1, **asdict(r)} for i, r in enumerate(recs)], None
+
+    stats = {"queries": 0, "rows": 0, "degraded": 0, "errors": 0, "parse_s": 0.0, "embed_s": 0.0, "retrieve_s": 0.0}
+    t_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for chunk in chunked(read_queries(source, skip=done_lines), args.chunk_size):
+            recs = [{k: v for k, v in rec.items() if k != "error"} for _, rec in chunk]
+
+            ## Gemini calls are I/O bound -> threads; one batched encode for the whole chunk ...
+            t0 = time.perf_counter()
+            parsed = list(pool.map(parse, recs))
+            t1 = time.perf_counter()
+            embs = embed_texts([r["query"] for r in recs], batch_size=settings.embed_batch_size)
+            t2 = time.perf_counter()
+            results = list(pool.map(recommend, zip(recs, parsed, embs)))
+            t3 = time.perf_counter()
+
+            rows = [row for rs, _ in results for row in rs]
+            writer.write(rows)
+            errors = []
+            for (lineno, _), rec, (_, err) in zip(chunk, recs, results):
+                if err:
+                    print(f"[error] {rec['id']}: {err}", file=sys.stderr)
+                    errors.append({**rec, "line": rec.get("line", lineno), "error": err})
+            failed.write(errors)
+
+            ## output and errors are flushed before the checkpoint moves, so a resume never skips a chunk ...
+            if args.retry_failed:
+                state = {**state, **writer.state(), "retry_lines": chunk[-1][0] + 1,
+                         "retry_errors_bytes": failed.state()["output_bytes"]}
+            else:
+                state = {"input": str(args.input.resolve()), "lines": chunk[-1][0] + 1, "format": fmt,
+                         **writer.state(), "errors_bytes": failed.state()["output_bytes"]}
+            save_checkpoint(args.output, state)
+
+            stats["queries"] += len(recs)
+            stats["rows"] += len(rows)
+            stats["degraded"] += sum(p.degraded for p in parsed)
+            stats["errors"] += sum(1 for _, err in results if err)
+            stats["parse_s"] += t1 - t0
+            stats["embed_s"] += t2 - t1
+            stats["retrieve_s"] += t3 - t2
+            elapsed = time.perf_counter() - t_start
+            print(f"   {stats['queries']} queries, {stats['queries'] / max(elapsed, 1e-9):.1f} q/s", file=sys.stderr)
+    writer.close()
+    failed.close()
+    if args.retry_failed:
+        ## the queries that still fail become the new errors file ...
+        failed_out.replace(errors_file)
+        state = {k: v for k, v in (state or {}).items() if not k.startswith("retry_")}
+        save_checkpoint(args.output, {**state, "errors_bytes": errors_file.stat().st_size})
+
+    elapsed = time.perf_counter() - t_start
+    print(f"✅ {stats['queries']} queries -> {stats['rows']} rows in {args.output} ({fmt})"
+          + (f", resumed after line {done_lines}" if done_lines else ""))
+    print(f"   Throughput: {stats['queries'] / max(elapsed, 1e-9):.1f} queries/s over {elapsed:.1f}s "
+          f"(parse {stats['parse_s']:.1f}s, embed {stats['embed_s']:.1f}s, retrieve {stats['retrieve_s']:.1f}s)")
+    print(f"   Degraded parses: {stats['degraded']}, retrieval errors: {stats['errors']}")
+    if stats["errors"]:
+        print(f"   Failed queries in {errors_file}; rerun with --retry-failed")
+    if llm is not None:
+        print(f"   LLM: {llm.stats()}")
+
+if __name__ == "__main__":
+    main()
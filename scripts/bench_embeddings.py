@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.data_loader import load_joined_dataset
+from src.embeddings import EMBEDDING_BACKENDS, get_embedding_model
+from src.indexer import build_docs_from_df
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_QUERIES = [
+    "I want a burger in 30 mins",
+    "Order something spicy veg under 250 near Mumbai",
+    "From Italian Delight 13 give me a mild pasta under 400",
+    "paneer that's spicy",
+    "masala dosa",
+    "light continental salad",
+    "chilli chicken delivered fast in Delhi",
+    "cheap biryani",
+]
+
+def _startup_seconds(backend: str) -> float:
+    ## fresh interpreter, so imports (torch vs onnxruntime) are part of the measurement ...
+    code = (
+        "import time; t=time.perf_counter();"
+        "from src.embeddings import get_embedding_model;"
+        f"m=get_embedding_model(backend={backend!r});"
+        "m.encode(['warm up'], normalize_embeddings=True);"
+        "print(time.perf_counter()-t)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+def _encode(backend: str, texts: list[str]) -> np.ndarray:
+    model = get_embedding_model(backend=backend)
+    return np.asarray(model.encode(texts, batch_size=64, show_progress_bar=False, normalize_embeddings=True))
+
+def _query_latency_ms(backend: str, queries: list[str], repeats: int) -> list[float]:
+    model = get_embedding_model(backend=backend)
+    out = []
+    for _ in range(repeats):
+        for q in queries:
+            t = time.perf_counter()
+            model.encode([q], show_progress_bar=False, normalize_embeddings=True)
+            out.append((time.perf_counter() - t) * 1000.0)
+    return out
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parity + latency/startup comparison of embedding backends.")
+    parser.add_argument("--backends", default="onnx,onnx-int8", help="compared against torch")
+    parser.add_argument("--num-docs", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="fp32 parity threshold")
+    parser.add_argument("--min-cosine-int8", type=float, default=0.95)
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    for b in backends:
+        if b not in EMBEDDING_BACKENDS or b == "torch":
+            raise SystemExit(f"Unsupported backend to compare: {b}")
+
+    df = load_joined_dataset(ROOT / "data" / "restaurants.json", ROOT / "data" / "menu.json")
+    docs = [d.text for d in build_docs_from_df(df)[: args.num_docs]]
+
+    ref_docs = _encode("torch", docs)
+    ref_q = _encode("torch", _QUERIES)
+    ref_sims = ref_q @ ref_docs.T
+    ref_top = np.argsort(-ref_sims, axis=1)[:, : args.k]
+
+    failed = False
+    rows = [("torch", _startup_seconds("torch"), _query_latency_ms("torch", _QUERIES, args.repeats), None, None, None)]
+    for b in backends:
+        cand_docs = _encode(b, docs)
+        cand_q = _encode(b, _QUERIES)
+
+        ## parity: same text -> nearly the same vector, and query/doc cosine similarities agree ...
+        per_text = np.sum(cand_docs * ref_docs, axis=1)
+        sim_err = np.abs(cand_q @ cand_docs.T - ref_sims)
+        cand_top = np.argsort(-(cand_q @ cand_docs.T), axis=1)[:, : args.k]
+        overlap = np.mean([len(set(a) & set(c)) / args.k for a, c in zip(ref_top, cand_top)])
+
+        threshold = args.min_cosine_int8 if b == "onnx-int8" else args.min_cosine
+        if float(per_text.min()) < threshold:
+            failed = True
+
+        rows.append((b, _startup_seconds(b), _query_latency_ms(b, _QUERIES, args.repeats),
+                     float(per_text.min()), float(sim_err.max()), float(overlap)))
+
+    print(f"{'backend':<10} {'startup_s':>9} {'p50_ms':>7} {'p95_ms':>7} {'min_cos':>8} {'max|Δsim|':>9} {'top@k':>6}")
+    for b, startup, lat, min_cos, max_err, overlap in rows:
+        lat_sorted = sorted(lat)
+        p95 = lat_sorted[int(0.95 * (len(lat_sorted) - 1))]
+        tail = "" if min_cos is None else f" {min_cos:8.4f} {max_err:9.4f} {overlap:6.3f}"
+        print(f"{b:<10} {startup:9.2f} {statistics.median(lat):7.2f} {p95:7.2f}{tail}")
+
+    if failed:
+        raise SystemExit("❌ Parity check failed: an ONNX backend drifted below the cosine threshold.")
+    print("✅ Parity check passed.")
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,35 @@
 from __future__ import annotations
 
+import argparse
+import time
 from pathlib import Path
 
 from src.config import get_settings
 from src.data_loader import load_joined_dataset
-from src.indexer import build_docs_from_df, rebuild_collection
+from src.index_registry import read_registry
+from src.indexer import EMBEDDING_MODES, build_docs_from_df, embed_docs, hnsw_metadata_from_settings, rebuild_collection
+from src.query_log import top_queries
+from src.warmup import warm_up
 
 def main() -> None:
     settings = get_settings()
 
+    parser = argparse.ArgumentParser(description="Build the Chroma collection from data/*.json.")
+    parser.add_argument("--workers", type=int, default=settings.embed_workers,
+                        help="encode worker processes (default: EMBED_WORKERS or 1)")
+    parser.add_argument("--batch-size", type=int, default=settings.embed_batch_size,
+                        help="texts per model forward pass (default: EMBED_BATCH_SIZE or 64)")
+    parser.add_argument("--embedding-mode", choices=EMBEDDING_MODES, default=settings.embedding_mode,
+                        help="per_item: one encode per item, factorized: shared dish/restaurant parts")
+    parser.add_argument("--keep-versions", type=int, default=2,
+                        help="published versions kept on disk (live + rollback targets)")
+    parser.add_argument("--warm-top-n", type=int, default=settings.warmup_top_n,
+                        help="replay the N most frequent logged queries against the new version; "
+                             "any failing query aborts the publish")
+    parser.add_argument("--validation-query", action="append", default=None,
+                        help="sample query that must return results before the new index goes live")
+    args = parser.parse_args()
+
     root = Path(__file__).resolve().parents[1]
     data_dir = root / "data"
 
@@ -27,14 +48,56 @@ def main() -> None:
     ### Build the “document text” (semantic searchable string)
     docs = build_docs_from_df(df)
 
+    ### Encode all documents (optionally across a process pool) ...
+    t0 = time.perf_counter()
+    embeddings = embed_docs(docs, mode=args.embedding_mode, batch_size=args.batch_size, num_workers=args.workers)
+    encode_s = time.perf_counter() - t0
+
+    ## readiness check with real traffic (QUERY_LOG_PATH) before the alias flips: caches filled
+    ## here die with this process, so the point is that the new version answers every logged query ...
+    warm_entries = top_queries(root / settings.query_log_path, args.warm_top_n) if settings.query_log_path else []
+    warm_reports: list[dict] = []
+
+    def check_ready(physical: str) -> None:
+        report = warm_up(
+            entries=warm_entries,
+            chroma_dir=str(root / settings.chroma_dir),
+            collection_name=physical,
+            max_per_restaurant=settings.max_per_restaurant,
+            dedup_dishes=settings.dedup_dishes,
+        )
+        warm_reports.append(report)
+        if report["errors"]:
+            raise RuntimeError(
+                f"{report['errors']} of {report['queries']} logged queries failed against {physical}; not publishing."
+            )
+
+    t1 = time.perf_counter()
     total = rebuild_collection(
         persist_dir=str(root / settings.chroma_dir),
         collection_name=settings.collection_name,
         docs=docs,
+        hnsw=hnsw_metadata_from_settings(settings),
+        embeddings=embeddings,
+        validation_queries=args.validation_query or [
+            "I want a burger in 30 mins",
+            "Order something spicy veg under 250 near Mumbai",
+        ],
+        keep_versions=args.keep_versions,
+        before_publish=check_ready if warm_entries else None,
     )
+    write_s = time.perf_counter() - t1
 
     print(f"✅ Indexed {total} menu items into ChromaDB at: {root / settings.chroma_dir}")
-    print(f"   Collection: {settings.collection_name}")
+    live = read_registry(str(root / settings.chroma_dir)).get(settings.collection_name) or {}
+    print(f"   Collection: {settings.collection_name} -> {live.get('collection')} (version {live.get('version')})")
+    print(
+        f"   Encode: {encode_s:.1f}s ({len(docs) / max(encode_s, 1e-9):.0f} docs/s, "
+        f"workers={args.workers}, batch_size={args.batch_size}, mode={args.embedding_mode})"
+    )
+    print(f"   Index write: {write_s:.1f}s ({total / max(write_s, 1e-9):.0f} docs/s)")
+    for r in warm_reports:
+        print(f"   Readiness: {r['queries']} logged queries replayed in {r.get('total_s', 0.0):.1f}s")
 
 if __name__ == "__main__":
     main()
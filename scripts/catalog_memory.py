@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from src.catalog import CatalogStore
+from src.data_loader import load_joined_dataset
+from src.indexer import build_docs_from_df
+from src.retriever import Recommendation
+
+def measure(fn: Callable[[], Any]) -> tuple[Any, int]:
+    """Run `fn` and return its result plus the bytes it left allocated (tracemalloc)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    out = fn()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return out, after - before
+
+def synthetic_metadatas(base: list[dict], n: int) -> list[dict]:
+    ## the sample catalog replicated with fresh item ids, as a JSON payload so every copy
+    ## decodes into its own dict and strings (what a metadata-per-item cache holds) ...
+    rows = []
+    for i in range(n):
+        m = dict(base[i % len(base)])
+        m["item_id"] = i + 1
+        rows.append(m)
+    return rows
+
+def fmt(nbytes: int, n: int) -> str:
+    return f"{nbytes / 2**20:9.1f} MiB  {nbytes / max(n, 1):8.1f} B/item"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Memory of per-item metadata dicts vs. the compact catalog store.")
+    parser.add_argument("--items", type=int, default=200_000, help="synthetic catalog size")
+    parser.add_argument("--recs", type=int, default=100_000, help="Recommendation objects to allocate")
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[1]
+    df = load_joined_dataset(root / "data" / "restaurants.json", root / "data" / "menu.json")
+    base = [d.metadata for d in build_docs_from_df(df)]
+    payload = json.dumps(synthetic_metadatas(base, args.items))
+    n = args.items
+
+    dicts, dict_bytes = measure(lambda: json.loads(payload))
+    store, store_bytes = measure(lambda: CatalogStore.from_metadatas(dicts))
+    del dicts
+    views, view_bytes = measure(lambda: list(store))
+
+    print(f"Items: {n}")
+    print(f"metadata dicts (JSON decoded): {fmt(dict_bytes, n)}")
+    print(f"catalog store (columns):       {fmt(store_bytes, n)}")
+    print(f"  + one view per item:         {fmt(view_bytes, n)}")
+    print(f"  reduction vs dicts:          {dict_bytes / max(store_bytes, 1):.1f}x (store), "
+          f"{dict_bytes / max(store_bytes + view_bytes, 1):.1f}x (store + views)")
+    print("Per column (store.memory_report()):")
+    for col, nbytes in sorted(store.memory_report().items(), key=lambda kv: -kv[1]):
+        print(f"  {col:<24} {nbytes:>12,} B")
+    del views
+
+    ## same fields as Recommendation, without __slots__ ...
+    PlainRecommendation = make_dataclass("PlainRecommendation", [(f.name, f.type) for f in fields(Recommendation)])
+
+    def make(cls) -> list:
+        scores = {"similarity": 0.5, "final_score": 0.5}
+        out = []
+        for i in range(args.recs):
+            v = store.view(i % n)
+            out.append(cls(**{f.name: scores.get(f.name, v.get(f.name)) for f in fields(Recommendation)
+                              if f.name != "reason_tags"}, reason_tags=[]))
+        return out
+
+    _, plain_bytes = measure(lambda: make(PlainRecommendation))
+    _, slots_bytes = measure(lambda: make(Recommendation))
+    print(f"Recommendation x{args.recs}:")
+    print(f"  plain dataclass:             {fmt(plain_bytes, args.recs)}")
+    print(f"  slots dataclass:             {fmt(slots_bytes, args.recs)}")
+
+if __name__ == "__main__":
+    main()
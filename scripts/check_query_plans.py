@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from src.config import get_settings
+from src.embeddings import embed_texts
+from src.planner import BRUTE_FORCE_MAX
+from src.retriever import retrieve
+from src.semantic_cache import SemanticQueryCache
+
+## hard-filter sets of increasing width; on the sample data (1000 items) they pass
+## 161 / 285 / 731 / 1000 docs, i.e. exact, restricted ANN and post-filtered ANN ...
+CASES = [
+    {"veg": True, "location": "Mumbai"},
+    {"spice_level": "spicy"},
+    {"veg": True},
+    {},
+]
+PLANS = ("exact", "restricted ANN", "post-filtered ANN")
+
+class _PlanRecorder(logging.Handler):
+    """Collects the plans `retrieve` actually picked (the planner logs each one)."""
+
+    def __init__(self) -> None:
+        super().__init__(logging.INFO)
+        self.plans = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        plan = getattr(record, "plan", None)
+        if plan is not None:
+            self.plans.append(plan)
+
+def main() -> None:
+    settings = get_settings()
+    root = Path(__file__).resolve().parents[1]
+
+    parser = argparse.ArgumentParser(description="Run retrieve over filter sets that should hit every query plan.")
+    parser.add_argument("--query", default="something warm and comforting for a rainy evening",
+                        help="free text without exact dish / restaurant names (skips the lexical fast path)")
+    parser.add_argument("--paraphrase", default="warm comforting food for a rainy night",
+                        help="second query run through a semantic cache, to exercise candidate reuse")
+    parser.add_argument("--brute-force-max", type=int, default=BRUTE_FORCE_MAX)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidate-k", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per case")
+    args = parser.parse_args()
+
+    recorder = _PlanRecorder()
+    planner_logger = logging.getLogger("src.planner")
+    planner_logger.addHandler(recorder)
+    planner_logger.setLevel(logging.INFO)
+
+    q_emb, p_emb = embed_texts([args.query, args.paraphrase])
+    common = dict(
+        chroma_dir=str(root / settings.chroma_dir),
+        collection_name=settings.collection_name,
+        top_k=args.top_k,
+        candidate_k=args.candidate_k,
+        use_lexical=False,
+        brute_force_max=args.brute_force_max,
+    )
+
+    seen = set()
+    print(f"{'filters':<40} {'allowed':>7}  {'plan':<18} {'cand_k':>6} {'p50 ms':>7}  sem-cache")
+    for filters in CASES:
+        times = []
+        for _ in range(max(1, args.repeat)):
+            recorder.plans.clear()
+            t0 = time.perf_counter()
+            retrieve(query_text=args.query, filters=filters, query_embedding=q_emb, use_cache=False, **common)
+            times.append(time.perf_counter() - t0)
+        plan = recorder.plans[-1]
+        seen.add(plan.label)
+
+        ## a paraphrase after the original reuses its candidates (ANN plans only) ...
+        cache = SemanticQueryCache(threshold=0.8)
+        for text, emb in ((args.query, q_emb), (args.paraphrase, p_emb)):
+            retrieve(query_text=text, filters=filters, query_embedding=emb, use_cache=False,
+                     semantic_cache=cache, **common)
+        sem = cache.stats().get("candidates", {})
+
+        print(f"{str(filters):<40} {plan.allowed:>7}  {plan.label:<18} {plan.candidate_k:>6} "
+              f"{statistics.median(times) * 1000:7.1f}  hits={sem.get('hits', 0)}")
+
+    missing = [p for p in PLANS if p not in seen]
+    if missing:
+        print(f"\n❌ Plans never taken: {', '.join(missing)} (catalog or --brute-force-max changed?)")
+        sys.exit(1)
+    print("\n✅ All query plans exercised.")
+
+if __name__ == "__main__":
+    main()
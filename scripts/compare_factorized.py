@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.data_loader import load_joined_dataset
+from src.embeddings import embed_texts
+from src.indexer import FACTOR_WEIGHTS, build_docs_from_df, embed_docs
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recall of factorized vs. per-item document embeddings.")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[1]
+    df = load_joined_dataset(root / "data" / "restaurants.json", root / "data" / "menu.json")
+    docs = build_docs_from_df(df)
+    rng = random.Random(args.seed)
+
+    t0 = time.perf_counter()
+    full = np.asarray(embed_docs(docs, mode="per_item"), dtype=np.float32)
+    full_s = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    fact = np.asarray(embed_docs(docs, mode="factorized"), dtype=np.float32)
+    fact_s = time.perf_counter() - t1
+
+    full_encodes = len({d.text for d in docs})
+    fact_encodes = len({getattr(d, p) or d.text for d in docs for p in FACTOR_WEIGHTS})
+
+    ## queries: short natural requests derived from random catalog items ...
+    sample = rng.sample(docs, min(args.num_queries, len(docs)))
+    queries = []
+    for d in sample:
+        m = d.metadata
+        parts = [m["spice_level"] if rng.random() < 0.5 else "", m["item_name"]]
+        if rng.random() < 0.3:
+            parts += ["from", m["restaurant_name"]]
+        if rng.random() < 0.3:
+            parts += ["in", m["location"]]
+        queries.append(" ".join(p for p in parts if p))
+    q = np.asarray(embed_texts(queries), dtype=np.float32)
+
+    k = min(args.k, len(docs))
+    ref = np.argsort(-(q @ full.T), axis=1)[:, :k]
+    got = np.argsort(-(q @ fact.T), axis=1)[:, :k]
+    recall = float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref, got)]))
+    per_doc_cos = np.sum(full * fact, axis=1)
+
+    print(f"Docs: {len(docs)}")
+    print(f"per_item:   {full_encodes:>8} unique encodes  {full_s:6.2f}s")
+    print(f"factorized: {fact_encodes:>8} unique encodes  {fact_s:6.2f}s")
+    print(f"recall@{k} of factorized vs per-item ranking: {recall:.3f}")
+    print(f"cosine(per_item, factorized) per doc: mean {per_doc_cos.mean():.3f}, min {per_doc_cos.min():.3f}")
+
+if __name__ == "__main__":
+    main()
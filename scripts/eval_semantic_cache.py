@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.cache import canonical_filters
+from src.config import get_settings
+from src.data_loader import load_restaurants
+from src.embeddings import embed_text
+from src.nlp import parse_query
+from src.retriever import retrieve
+from src.semantic_cache import SemanticQueryCache
+
+class _MemoClient:
+    """Gemini client wrapper: identical prompts are sent once, so baseline and cached runs share calls."""
+
+    def __init__(self, inner) -> None:
+        self._inner = inner
+        self._memo: dict[str, object] = {}
+        self.calls = 0
+        self.models = self
+
+    def generate_content(self, *, model: str, contents: str):
+        if contents not in self._memo:
+            self.calls += 1
+            self._memo[contents] = self._inner.models.generate_content(model=model, contents=contents)
+        return self._memo[contents]
+
+class _NoFilterClient:
+    ## --no-llm: every query parses to "no filters" ...
+    def __init__(self) -> None:
+        self.models = self
+
+    def generate_content(self, *, model: str, contents: str):
+        return SimpleNamespace(text=json.dumps({"filters": {}}))
+
+def _read_log(path: str) -> list[str]:
+    out = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            q = (json.loads(line).get("query") or "").strip()
+        else:
+            q = line
+        if q:
+            out.append(q)
+    return out
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Hit rate and quality delta of the semantic query cache.")
+    parser.add_argument("--log", required=True, help="query log (.txt one per line, or JSONL with 'query')")
+    parser.add_argument("--threshold", type=float, default=0.92)
+    parser.add_argument("--max-entries", type=int, default=512)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidate-k", type=int, default=40)
+    parser.add_argument("--no-llm", action="store_true", help="skip Gemini, evaluate candidate reuse only")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    root = Path(__file__).resolve().parents[1]
+    rdf = load_restaurants(root / "data" / "restaurants.json")
+    known = dict(
+        known_restaurants=sorted(rdf["restaurant_name"].dropna().astype(str).unique().tolist()),
+        known_locations=sorted(rdf["location"].dropna().astype(str).unique().tolist()),
+        known_cuisines=sorted(rdf["cuisine_type"].dropna().astype(str).unique().tolist()),
+    )
+
+    if args.no_llm:
+        client = _NoFilterClient()
+    else:
+        from google import genai
+
+        client = _MemoClient(genai.Client(api_key=settings.google_api_key))
+
+    cache = SemanticQueryCache(threshold=args.threshold, max_entries=args.max_entries)
+    queries = _read_log(args.log)
+
+    overlaps, hit_overlaps, top1_deltas = [], [], []
+    filter_agree = 0
+    for q in queries:
+        q_emb = embed_text(q)
+        before = cache.stats()
+
+        ## cached path first (it is what production would run), then the uncached reference ...
+        cached_parsed = parse_query(client=client, model=settings.gemini_model, query=q,
+                                    semantic_cache=cache, query_embedding=q_emb, **known)
+        ref_parsed = parse_query(client=client, model=settings.gemini_model, query=q, **known)
+        filter_agree += canonical_filters(cached_parsed.filters) == canonical_filters(ref_parsed.filters)
+
+        common = dict(chroma_dir=str(root / settings.chroma_dir), collection_name=settings.collection_name,
+                      query_text=q, top_k=args.top_k, candidate_k=args.candidate_k, use_cache=False,
+                      query_embedding=q_emb)
+        cached_recs = retrieve(filters=cached_parsed.filters, semantic_cache=cache, **common)
+        ref_recs = retrieve(filters=ref_parsed.filters, **common)
+
+        a = {r.item_id for r in cached_recs}
+        b = {r.item_id for r in ref_recs}
+        overlap = len(a & b) / max(len(b), 1) if b else 1.0
+        overlaps.append(overlap)
+
+        after = cache.stats()
+        was_hit = any(after[ns]["hits"] > before.get(ns, {}).get("hits", 0) for ns in after)
+        if was_hit:
+            hit_overlaps.append(overlap)
+        if cached_recs and ref_recs:
+            top1_deltas.append(cached_recs[0].final_score - ref_recs[0].final_score)
+
+    stats = cache.stats()
+    print(f"Queries: {len(queries)}  threshold={args.threshold}")
+    for ns, row in sorted(stats.items()):
+        print(f"  {ns:<11} hit rate {row['hit_rate']:.1%} ({row['hits']} hits / {row['misses']} misses)")
+    if isinstance(client, _MemoClient):
+        print(f"  Gemini calls avoided: {stats.get('filters', {}).get('hits', 0)} of {len(queries)}")
+    print("Quality vs. uncached:")
+    print(f"  filters identical:        {filter_agree / max(len(queries), 1):.1%}")
+    print(f"  top-{args.top_k} overlap (all):    {statistics.mean(overlaps) if overlaps else 1.0:.3f}")
+    print(f"  top-{args.top_k} overlap (on hits): {statistics.mean(hit_overlaps) if hit_overlaps else 1.0:.3f}")
+    print(f"  mean top-1 score delta:   {statistics.mean(top1_deltas) if top1_deltas else 0.0:+.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+from src.onnx_embedder import ONNX_FP32_FILE, ONNX_INT8_FILE, TOKENIZER_FILE
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX (+ dynamic int8).")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--out-dir", default="models/onnx")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--no-quantize", action="store_true", help="skip the int8 model")
+    args = parser.parse_args()
+
+    ## export needs torch + transformers once; serving only needs onnxruntime + tokenizers ...
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModel.from_pretrained(args.model)
+    model.eval()
+
+    sample = tokenizer(["a spicy paneer curry", "masala dosa"], padding=True, return_tensors="pt")
+    inputs = (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"])
+    dynamic = {0: "batch", 1: "seq"}
+
+    fp32_path = out_dir / ONNX_FP32_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            inputs,
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": dynamic,
+                "attention_mask": dynamic,
+                "token_type_ids": dynamic,
+                "last_hidden_state": dynamic,
+            },
+            opset_version=args.opset,
+            do_constant_folding=True,
+        )
+
+    ## the fast tokenizer's tokenizer.json is all the runtime needs ...
+    tokenizer.backend_tokenizer.save(str(out_dir / TOKENIZER_FILE))
+    print(f"✅ Exported {args.model} -> {fp32_path}")
+
+    if not args.no_quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = out_dir / ONNX_INT8_FILE
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        print(f"✅ Dynamic int8 model -> {int8_path}")
+
+if __name__ == "__main__":
+    main()
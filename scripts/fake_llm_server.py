@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+## Minimal stand-in for the Gemini REST API (`POST /v1beta/models/<model>:generateContent`)
+## with configurable latency and failures, for exercising src/llm_client.py without the real service.
+## Point the app at it with GEMINI_BASE_URL=http://127.0.0.1:8765
+
+_STATS = {"requests": 0, "errors": 0}
+_STATS_LOCK = threading.Lock()
+
+def _fake_filters(prompt: str) -> dict:
+    m = re.search(r'User query:\s*"""(.*?)"""', prompt, flags=re.DOTALL)
+    q = (m.group(1) if m else prompt).lower()
+    price = re.search(r"under\s*(\d+)", q)
+    eta = re.search(r"(\d+)\s*min", q)
+    spice = next((s for s in ("mild", "medium", "spicy") if s in q), None)
+    return {
+        "veg": True if re.search(r"\bveg\b|vegetarian", q) else None,
+        "spice_level": spice,
+        "max_price": int(price.group(1)) if price else None,
+        "max_delivery_time_minutes": int(eta.group(1)) if eta else None,
+        "restaurant_name": None,
+        "location": None,
+        "cuisine_type": None,
+    }
+
+def _response_text(prompt: str) -> str:
+    if "Return ONLY valid JSON" in prompt:
+        return json.dumps({"filters": _fake_filters(prompt)})
+    return "These items match your request on taste, price and delivery time."
+
+def make_handler(args: argparse.Namespace) -> type[BaseHTTPRequestHandler]:
+    rng = random.Random(args.seed)
+    rng_lock = threading.Lock()
+
+    def sample_latency() -> tuple[float, bool]:
+        ## log-normal body with an optional slow tail, in seconds ...
+        with rng_lock:
+            slow = rng.random() < args.slow_rate
+            base = rng.lognormvariate(0.0, args.latency_sigma) * args.latency_ms / 1000.0
+            fail = rng.random() < args.error_rate
+        return (base + (args.slow_ms / 1000.0 if slow else 0.0)), fail
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *a) -> None:
+            pass
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            delay, fail = sample_latency()
+            time.sleep(delay)
+            with _STATS_LOCK:
+                _STATS["requests"] += 1
+                _STATS["errors"] += int(fail)
+            if fail or ":generateContent" not in self.path:
+                self._send(503 if fail else 404, {"error": {"code": 503 if fail else 404,
+                                                             "message": "fake failure", "status": "UNAVAILABLE"}})
+                return
+            try:
+                req = json.loads(body or b"{}")
+                prompt = "".join(p.get("text", "") for c in req.get("contents", []) for p in c.get("parts", []))
+            except (ValueError, AttributeError):
+                prompt = ""
+            self._send(200, {
+                "candidates": [{
+                    "content": {"role": "model", "parts": [{"text": _response_text(prompt)}]},
+                    "finishReason": "STOP",
+                }],
+            })
+
+        def do_GET(self) -> None:
+            with _STATS_LOCK:
+                self._send(200, dict(_STATS))
+
+        def _send(self, status: int, payload: dict) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+def serve(args: argparse.Namespace) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    server.daemon_threads = True
+    return server
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Local fake Gemini endpoint with configurable latency/failures.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread of the latency")
+    parser.add_argument("--slow-rate", type=float, default=0.02, help="fraction of requests in the slow tail")
+    parser.add_argument("--slow-ms", type=float, default=5000.0, help="extra latency of slow requests")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+def main() -> None:
+    args = build_parser().parse_args()
+    server = serve(args)
+    print(f"Fake Gemini listening on http://{args.host}:{server.server_address[1]} (GET / for stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from src.config import get_settings
+from src.index_artifact import ARTIFACT_SUFFIX, export_index, import_index, open_artifact
+from src.index_registry import read_registry
+
+def main() -> None:
+    settings = get_settings()
+    root = Path(__file__).resolve().parents[1]
+    persist_dir = str(root / settings.chroma_dir)
+
+    parser = argparse.ArgumentParser(description="Export / import a prebuilt index as a single artifact file.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="package the live collection into one checksummed file")
+    exp.add_argument("--out", default=f"dist/{settings.collection_name}{ARTIFACT_SUFFIX}")
+
+    imp = sub.add_parser("import", help="publish an artifact as the new live version")
+    imp.add_argument("artifact")
+    imp.add_argument("--keep-versions", type=int, default=2)
+    imp.add_argument("--no-verify", action="store_true", help="skip checksum verification")
+
+    info = sub.add_parser("info", help="print an artifact header")
+    info.add_argument("artifact")
+
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.command == "export":
+        data_dir = root / "data"
+        header = export_index(
+            persist_dir=persist_dir,
+            collection_name=settings.collection_name,
+            out_path=args.out,
+            data_files=[p for p in (data_dir / "restaurants.json", data_dir / "menu.json") if p.exists()],
+        )
+        size_mb = Path(args.out).stat().st_size / 1e6
+        print(f"✅ Exported {header['count']} items ({header['source_collection']}) to {args.out} ({size_mb:.1f} MB)")
+    elif args.command == "import":
+        header = import_index(
+            artifact=args.artifact,
+            persist_dir=persist_dir,
+            collection_name=settings.collection_name,
+            keep_versions=args.keep_versions,
+            verify=not args.no_verify,
+        )
+        live = read_registry(persist_dir).get(settings.collection_name) or {}
+        print(f"✅ Imported {header['count']} items from {args.artifact}")
+        print(f"   Collection: {settings.collection_name} -> {live.get('collection')} (version {live.get('version')})")
+    else:
+        header = open_artifact(args.artifact, verify=False).header
+        for key in ("format_version", "collection_name", "index_version", "model_name",
+                    "embedding_backend", "count", "dim", "data_hashes", "files"):
+            print(f"{key}: {header.get(key)}")
+    print(f"   Took {time.perf_counter() - t0:.2f}s")
+
+if __name__ == "__main__":
+    main()
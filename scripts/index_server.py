@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+from urllib.parse import urlparse
+
+from src.config import get_settings
+
+## Runs one Chroma server over the persisted index so app workers share a single in-memory copy.
+## Point every app / build process at it with CHROMA_SERVER_URL=http://<host>:<port>.
+## Only the vectors live in the server: builds write index_registry.json and the side indexes
+## (lexical, attributes, score stats, catalog) to their local CHROMA_DIR, and app processes read
+## them from theirs, so run builds on the app host or share CHROMA_DIR between them.
+
+def main() -> None:
+    settings = get_settings()
+    root = Path(__file__).resolve().parents[1]
+
+    url = urlparse(settings.chroma_server_url or "http://127.0.0.1:8000")
+    parser = argparse.ArgumentParser(description="Serve the Chroma index to all app processes.")
+    parser.add_argument("--host", default=url.hostname or "127.0.0.1")
+    parser.add_argument("--port", type=int, default=url.port or 8000)
+    parser.add_argument("--path", default=str(root / settings.chroma_dir), help="persist dir to serve")
+    args = parser.parse_args()
+
+    chroma = shutil.which("chroma")
+    if chroma is None:
+        raise SystemExit("The `chroma` CLI was not found; it ships with the chromadb package.")
+    Path(args.path).mkdir(parents=True, exist_ok=True)
+
+    print(f"Serving {args.path} on http://{args.host}:{args.port}", file=sys.stderr)
+    print(f"   export CHROMA_SERVER_URL=http://{args.host}:{args.port}", file=sys.stderr)
+    sys.stderr.flush()
+    ## replace this process, so signals from the supervisor reach the server directly ...
+    os.execv(chroma, [chroma, "run", "--path", args.path, "--host", args.host, "--port", str(args.port)])
+
+if __name__ == "__main__":
+    main()
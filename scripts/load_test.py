@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+## Drives the same code path as app/streamlit_app.py (embed -> parse_query -> retrieve -> explanation)
+## from N concurrent simulated users in one process, so the model, the Chroma client, the caches and
+## the GIL are shared exactly like between Streamlit sessions. Gemini is a local fake by default.
+
+DEFAULT_MIX = [
+    "I want a burger in 30 mins",
+    "Order something spicy veg under 250 near Mumbai",
+    "From Italian Delight 13 give me a mild pasta under 400",
+    "I want a butter chicken in 30 mins",
+    "cheap veg biryani",
+    "paneer tikka under 300",
+    "something sweet for dessert",
+    "spicy chinese noodles in Delhi",
+    "healthy salad under 200",
+    "pizza with extra cheese",
+]
+
+## templates for the generated default mix; filled from the catalog so most requests are distinct
+## and miss the parse cache, i.e. actually reach the (fake) LLM and its latency / slow / error knobs ...
+TEMPLATES = [
+    "{dish} under {price}",
+    "{spice} {dish} near {location}",
+    "I want {dish} in {minutes} mins",
+    "{veg} {cuisine} food under {price} in {location}",
+    "something {spice} from a {cuisine} place, {veg}",
+    "{dish} from {restaurant}",
+]
+
+def generated_mix(root: Path, size: int, seed: int) -> list[str]:
+    menu = json.loads((root / "data" / "menu.json").read_text(encoding="utf-8"))
+    restaurants = json.loads((root / "data" / "restaurants.json").read_text(encoding="utf-8"))
+    rng = random.Random(seed)
+    pools = {
+        "dish": sorted({m["item_name"].lower() for m in menu}),
+        "restaurant": sorted({r["restaurant_name"] for r in restaurants}),
+        "location": sorted({r["location"] for r in restaurants}),
+        "cuisine": sorted({r["cuisine_type"] for r in restaurants}),
+        "spice": ["mild", "medium spicy", "spicy", "very spicy"],
+        "veg": ["veg", "non-veg", "pure veg"],
+        "price": [str(p) for p in range(100, 800, 50)],
+        "minutes": [str(m) for m in range(20, 65, 5)],
+    }
+    out, seen = list(DEFAULT_MIX), set(DEFAULT_MIX)
+    ## bounded attempts: a tiny catalog may not have `size` distinct combinations ...
+    for _ in range(size * 20):
+        if len(out) >= size:
+            break
+        q = rng.choice(TEMPLATES).format(**{k: rng.choice(v) for k, v in pools.items()})
+        if q not in seen:
+            seen.add(q)
+            out.append(q)
+    return out
+
+def load_mix(path: Optional[Path], root: Path, size: int, seed: int) -> list[str]:
+    if path is None:
+        return generated_mix(root, size, seed)
+    out = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        out.append(json.loads(line)["query"] if line.startswith("{") else line)
+    return out
+
+class ResourceSampler(threading.Thread):
+    """CPU (process time / wall time) and RSS of this process every `interval` seconds."""
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples: list[dict[str, float]] = []
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def rss_mb() -> float:
+        try:
+            import psutil
+
+            return psutil.Process().memory_info().rss / 1e6
+        except ImportError:
+            pass
+        try:
+            with open("/proc/self/statm") as fh:
+                return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+        except (OSError, ValueError):
+            import resource
+
+            ## peak, not current, where /proc is not available ...
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+    def run(self) -> None:
+        t0 = last_wall = time.perf_counter()
+        last_cpu = time.process_time()
+        while not self._stop_event.wait(self.interval):
+            wall, cpu = time.perf_counter(), time.process_time()
+            self.samples.append({
+                "t": wall - t0,
+                "cpu_pct": 100.0 * (cpu - last_cpu) / max(wall - last_wall, 1e-9),
+                "rss_mb": self.rss_mb(),
+            })
+            last_wall, last_cpu = wall, cpu
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    a = np.asarray(values) * 1000.0
+    return {f"p{p}": float(np.percentile(a, p)) for p in (50, 90, 95, 99)} | {"max": float(a.max())}
+
+def main() -> None:
+    from src.config import get_settings
+
+    parser = argparse.ArgumentParser(description="Concurrent end-to-end load test with a fake Gemini.")
+    parser.add_argument("--users", type=int, default=8, help="concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of measured load")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which users start")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pause between a user's requests")
+    parser.add_argument("--queries", type=Path, default=None, help="query mix (text lines or JSONL with 'query')")
+    parser.add_argument("--mix-size", type=int, default=2000,
+                        help="distinct queries in the generated mix when --queries is not given")
+    parser.add_argument("--zipf", type=float, default=1.1, help="skew of the query mix (0 = uniform)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--explain", action="store_true", help="also make the explanation call")
+    parser.add_argument("--no-result-cache", action="store_true")
+    parser.add_argument("--no-parse-cache", action="store_true",
+                        help="clear the exact-match parse cache before every request (every parse calls the LLM "
+                             "unless the semantic cache answers)")
+    parser.add_argument("--llm-url", default=None, help="use this Gemini endpoint instead of the built-in fake")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--llm-latency-sigma", type=float, default=0.5)
+    parser.add_argument("--llm-slow-rate", type=float, default=0.02)
+    parser.add_argument("--llm-slow-ms", type=float, default=5000.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--sample-interval", type=float, default=1.0, help="seconds between CPU/RSS samples")
+    parser.add_argument("--json-out", type=Path, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    root = Path(__file__).resolve().parents[1]
+    server = None
+    if args.llm_url is None:
+        from scripts.fake_llm_server import build_parser as fake_parser, serve
+
+        fake_args = fake_parser().parse_args([
+            "--port", "0",
+            "--latency-ms", str(args.llm_latency_ms),
+            "--latency-sigma", str(args.llm_latency_sigma),
+            "--slow-rate", str(args.llm_slow_rate),
+            "--slow-ms", str(args.llm_slow_ms),
+            "--error-rate", str(args.llm_error_rate),
+            "--seed", str(args.seed),
+        ])
+        server = serve(fake_args)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.llm_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["GEMINI_BASE_URL"] = args.llm_url
+    os.environ.setdefault("GOOGLE_API_KEY", "load-test")
+    settings = get_settings()
+
+    from src.data_loader import load_restaurants
+    from src.embeddings import embed_text
+    from src.llm_client import ResilientLLM, make_gemini_client
+    from src.nlp import clear_parse_cache, parse_cache_stats, parse_query
+    from src.retriever import result_cache_stats, retrieve
+
+    llm = ResilientLLM.from_settings(make_gemini_client(settings), settings)
+    semantic_cache = None
+    if settings.semantic_cache_threshold is not None:
+        from src.semantic_cache import SemanticQueryCache
+
+        semantic_cache = SemanticQueryCache(threshold=settings.semantic_cache_threshold,
+                                            max_entries=settings.semantic_cache_size)
+    rdf = load_restaurants(root / "data" / "restaurants.json")
+    known = {
+        "known_restaurants": sorted(rdf["restaurant_name"].dropna().astype(str).unique().tolist()),
+        "known_locations": sorted(rdf["location"].dropna().astype(str).unique().tolist()),
+        "known_cuisines": sorted(rdf["cuisine_type"].dropna().astype(str).unique().tolist()),
+    }
+
+    mix = load_mix(args.queries, root, args.mix_size, args.seed)
+    weights = [1.0 / (i + 1) ** args.zipf for i in range(len(mix))]
+
+    def request(query: str, stages: dict[str, float]) -> bool:
+        ## mirrors the button handler in app/streamlit_app.py ...
+        t = time.perf_counter()
+        emb = embed_text(query)
+        stages["embed"] = time.perf_counter() - t
+
+        if args.no_parse_cache:
+            clear_parse_cache()
+        t = time.perf_counter()
+        parsed = parse_query(client=llm, model=settings.gemini_model, query=query,
+                             semantic_cache=semantic_cache, query_embedding=emb, **known)
+        stages["parse"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        recs = retrieve(
+            chroma_dir=str(root / settings.chroma_dir),
+            collection_name=settings.collection_name,
+            query_text=query,
+            filters=parsed.filters,
+            top_k=args.top_k,
+            candidate_k=max(100, args.top_k * 20),
+            query_embedding=emb,
+            semantic_cache=semantic_cache,
+            use_cache=not args.no_result_cache,
+            max_per_restaurant=settings.max_per_restaurant,
+            dedup_dishes=settings.dedup_dishes,
+        )
+        stages["retrieve"] = time.perf_counter() - t
+
+        if args.explain and recs:
+            t = time.perf_counter()
+            listing = "\n".join(f"- {r.item_name} from {r.restaurant_name}" for r in recs)
+            try:
+                llm.models.generate_content(model=settings.gemini_model,
+                                            contents=f"User request:\n{query}\n\nTop recommended items:\n{listing}")
+            except Exception:
+                pass
+            stages["explain"] = time.perf_counter() - t
+        return parsed.degraded
+
+    ## one warm request so the model load is not counted as user latency ...
+    request(mix[0], {})
+
+    lock = threading.Lock()
+    results: list[dict[str, Any]] = []
+    errors: dict[str, int] = defaultdict(int)
+    t_start = time.perf_counter()
+    stop_at = t_start + args.ramp_up + args.duration
+
+    def user(uid: int) -> None:
+        rng = random.Random(args.seed * 1000 + uid)
+        time.sleep(args.ramp_up * uid / max(args.users, 1))
+        while time.perf_counter() < stop_at:
+            query = rng.choices(mix, weights=weights)[0]
+            stages: dict[str, float] = {}
+            t0 = time.perf_counter()
+            try:
+                degraded = request(query, stages)
+                ok = True
+            except Exception as e:
+                degraded, ok = False, False
+                with lock:
+                    errors[type(e).__name__] += 1
+            done = time.perf_counter()
+            with lock:
+                results.append({"t": done, "latency": done - t0, "ok": ok, "degraded": degraded, **stages})
+            if args.think_ms:
+                time.sleep(args.think_ms / 1000.0)
+
+    sampler = ResourceSampler(args.sample_interval)
+    sampler.start()
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(args.users)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    sampler.stop()
+    if server is not None:
+        server.shutdown()
+    elapsed = time.perf_counter() - t_start
+
+    ## throughput over the steady-state window only (after ramp-up, before users stop sending) ...
+    steady = [r for r in results if t_start + args.ramp_up <= r["t"] <= stop_at]
+    window = max(args.duration, 1e-9)
+    ok = [r for r in steady if r["ok"]]
+    report = {
+        "users": args.users,
+        "duration_s": elapsed,
+        "requests": len(steady),
+        "throughput_rps": len(ok) / window,
+        "error_rate": (len(steady) - len(ok)) / max(len(steady), 1),
+        "degraded_rate": sum(r["degraded"] for r in ok) / max(len(ok), 1),
+        "errors": dict(errors),
+        "latency_ms": percentiles([r["latency"] for r in ok]),
+        "stage_latency_ms": {
+            s: percentiles([r[s] for r in ok if s in r]) for s in ("embed", "parse", "retrieve", "explain")
+            if any(s in r for r in ok)
+        },
+        "llm": llm.stats(),
+        "result_cache": result_cache_stats(),
+        "parse_cache": parse_cache_stats(),
+        "semantic_cache": semantic_cache.stats() if semantic_cache is not None else {},
+        "resources": sampler.samples,
+    }
+
+    print(f"Users: {args.users}, steady window {window:.1f}s, {len(steady)} requests")
+    print(f"Throughput: {report['throughput_rps']:.2f} req/s, errors {report['error_rate']:.1%}, "
+          f"degraded parses {report['degraded_rate']:.1%} {dict(errors) or ''}")
+    fmt = lambda p: "  ".join(f"{k} {v:7.1f}" for k, v in p.items())
+    print(f"Latency ms   {fmt(report['latency_ms'])}")
+    for s, p in report["stage_latency_ms"].items():
+        print(f"  {s:<10} {fmt(p)}")
+    print(f"LLM: {report['llm']}")
+    rates = [("result", report["result_cache"]), ("parse", report["parse_cache"])]
+    rates += [(f"semantic/{ns}", row) for ns, row in sorted(report["semantic_cache"].items())]
+    print("Cache hit rates: " + ", ".join(
+        f"{name} {row['hit_rate']:.1%} ({row['hits']}/{row['hits'] + row['misses']})" for name, row in rates))
+    print("    t(s)   cpu%   rss(MB)")
+    for smp in sampler.samples:
+        print(f"  {smp['t']:6.1f} {smp['cpu_pct']:6.0f} {smp['rss_mb']:9.1f}")
+    if args.json_out:
+        args.json_out.parent.mkdir(parents=True, exist_ok=True)
+        args.json_out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+## Import-time budget for the library modules in LIGHT_IMPORTS: each is imported in a fresh
+## interpreter, and the check fails (exit 1) if one errors, pulls in any of HEAVY_MODULES, or takes
+## longer than --budget-ms (median of --repeats runs, default 1500 ms). It also prints cold-start
+## timings of scripts/build_index.py and a bare-mode Streamlit run, optionally against a baseline:
+##
+##   python scripts/measure_cold_start.py [--budget-ms 1500] [--repeats 3] [--compare-ref <git-ref>]
+
+ROOT = Path(__file__).resolve().parents[1]
+
+## modules that must not be imported just by importing our library code ...
+HEAVY_MODULES = ["torch", "sentence_transformers", "chromadb", "google.genai", "onnxruntime"]
+
+LIGHT_IMPORTS = ["src.config", "src.data_loader", "src.embeddings", "src.indexer", "src.nlp", "src.retriever"]
+
+_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - t
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+def _probe(body: str, cwd: Path) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(cwd)
+    env.setdefault("GOOGLE_API_KEY", "cold-start-probe")
+    code = _PROBE.format(body=body, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        return {"seconds": float("nan"), "heavy": [], "error": out.stderr.strip().splitlines()[-1:]}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def _measure(cwd: Path, repeats: int) -> dict[str, dict]:
+    targets = {m: f"import {m}" for m in LIGHT_IMPORTS}
+    ## entry points: the build CLI up to argument parsing, and one bare-mode run of the Streamlit script
+    targets["scripts/build_index.py --help"] = (
+        "import runpy\n"
+        "sys.argv = ['build_index.py', '--help']\n"
+        "try:\n"
+        "    runpy.run_path('scripts/build_index.py', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+    targets["app/streamlit_app.py (bare)"] = "import runpy\nrunpy.run_path('app/streamlit_app.py', run_name='__main__')"
+
+    results: dict[str, dict] = {}
+    for name, body in targets.items():
+        runs = [_probe(body, cwd) for _ in range(repeats)]
+        ok = [r for r in runs if "error" not in r]
+        results[name] = {
+            "median_s": statistics.median([r["seconds"] for r in ok]) if ok else float("nan"),
+            "heavy": sorted({m for r in ok for m in r["heavy"]}),
+            "error": next((r["error"] for r in runs if "error" in r), None),
+        }
+    return results
+
+def _print(title: str, results: dict[str, dict], before: dict[str, dict] | None = None) -> None:
+    print(f"\n{title}")
+    print(f"{'target':<36} {'median_s':>9} {'before_s':>9}  heavy modules loaded")
+    for name, r in results.items():
+        b = "" if before is None else f"{before.get(name, {}).get('median_s', float('nan')):9.3f}"
+        heavy = ", ".join(r["heavy"]) or "-"
+        err = f"  (error: {r['error']})" if r["error"] else ""
+        print(f"{name:<36} {r['median_s']:9.3f} {b:>9}  {heavy}{err}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import-time budget check and cold-start measurement.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="per-module import budget")
+    parser.add_argument("--compare-ref", default=None, help="git ref to measure as the 'before' baseline")
+    args = parser.parse_args()
+
+    before = None
+    if args.compare_ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            wt = Path(tmp) / "baseline"
+            subprocess.run(["git", "worktree", "add", "--detach", str(wt), args.compare_ref], cwd=ROOT, check=True,
+                           capture_output=True)
+            try:
+                ## data files and .env are not tracked in every checkout, reuse ours ...
+                for rel in ["data", ".env"]:
+                    src, dst = ROOT / rel, wt / rel
+                    if src.exists() and not dst.exists():
+                        dst.symlink_to(src)
+                before = _measure(wt, args.repeats)
+            finally:
+                subprocess.run(["git", "worktree", "remove", "--force", str(wt)], cwd=ROOT, capture_output=True)
+        _print(f"Baseline ({args.compare_ref})", before)
+
+    after = _measure(ROOT, args.repeats)
+    _print("Current tree", after, before)
+
+    ## budget: library modules must import fast and without heavy dependencies ...
+    failures = []
+    for m in LIGHT_IMPORTS:
+        r = after[m]
+        if r["error"]:
+            failures.append(f"{m}: import failed ({r['error']})")
+        elif r["heavy"]:
+            failures.append(f"{m}: eagerly imports {', '.join(r['heavy'])}")
+        elif r["median_s"] * 1000.0 > args.budget_ms:
+            failures.append(f"{m}: {r['median_s'] * 1000.0:.0f}ms > budget {args.budget_ms:.0f}ms")
+
+    if failures:
+        print("\n❌ Import budget exceeded:")
+        for f in failures:
+            print(f"   {f}")
+        raise SystemExit(1)
+    print("\n✅ All library modules within the import budget.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from dataclasses import replace
+from pathlib import Path
+
+import numpy as np
+
+from src.config import get_settings, hnsw_config_path
+from src.data_loader import load_joined_dataset
+from src.embeddings import embed_texts
+from src.indexer import build_docs_from_df, get_chroma_client, hnsw_metadata
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[idx]
+
+def _load_queries(path: str | None, held_out_docs, n: int, rng: random.Random) -> list[str]:
+    if path:
+        lines = Path(path).read_text(encoding="utf-8").splitlines()
+        return [l.strip() for l in lines if l.strip()][:n]
+
+    ## no query log given -> build short natural queries from items that are NOT in the indexed sample ...
+    queries = []
+    for d in held_out_docs[:n]:
+        m = d.metadata
+        parts = [m["spice_level"], "veg" if m.get("veg") else "", m["item_name"], "from", m["cuisine_type"]]
+        if rng.random() < 0.3:
+            parts += ["in", m["location"]]
+        queries.append(" ".join(p for p in parts if p))
+    return queries
+
+## parameters fixed when the graph is built; search_ef only changes how it is queried ...
+BUILD_PARAMS = ("m", "construction_ef", "num_threads")
+
+def _build_key(r: dict) -> tuple:
+    return tuple(r["params"][p] for p in BUILD_PARAMS)
+
+def _pareto_front(results: list[dict]) -> list[dict]:
+    ## a config is dominated if another one is at least as good on recall, latency and build time
+    ## and strictly better on one of them; configs sharing a build share its build time, so
+    ## build time only separates different build-parameter groups ...
+    front = []
+    for r in results:
+        dominated = False
+        for o in results:
+            if o is r:
+                continue
+            same_build = _build_key(o) == _build_key(r)
+            better_or_equal = (
+                o["recall"] >= r["recall"]
+                and o["p50_ms"] <= r["p50_ms"]
+                and (same_build or o["build_s"] <= r["build_s"])
+            )
+            strictly_better = (
+                o["recall"] > r["recall"]
+                or o["p50_ms"] < r["p50_ms"]
+                or (not same_build and o["build_s"] < r["build_s"])
+            )
+            if better_or_equal and strictly_better:
+                dominated = True
+                break
+        if not dominated:
+            front.append(r)
+    front.sort(key=lambda r: (r["p50_ms"], -r["recall"]))
+    return front
+
+def _choose(front: list[dict], target_recall: float) -> dict:
+    ok = [r for r in front if r["recall"] >= target_recall]
+    if ok:
+        return min(ok, key=lambda r: (r["p50_ms"], r["build_s"]))
+    ## nothing reaches the target, fall back to the most accurate configuration ...
+    return max(front, key=lambda r: (r["recall"], -r["p50_ms"]))
+
+def _reopen(tuning_dir: str, settings, name: str):
+    ## an open collection keeps the ef_search its index was loaded with; a modified value only
+    ## applies once the index is loaded again, i.e. through a fresh client ...
+    from chromadb.api.shared_system_client import SharedSystemClient
+
+    SharedSystemClient.clear_system_cache()
+    client = get_chroma_client(tuning_dir, settings)
+    return client, client.get_collection(name)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sweep HNSW parameters and write back the best config.")
+    parser.add_argument("--sample-size", type=int, default=2000, help="catalog items to index per trial")
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--queries", default=None, help="optional file with one query per line")
+    parser.add_argument("--k", type=int, default=20, help="recall@k cutoff (use your candidate_k)")
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--m", type=_int_list, default=[8, 16, 32])
+    parser.add_argument("--construction-ef", type=_int_list, default=[64, 100, 200])
+    parser.add_argument("--search-ef", type=_int_list, default=[10, 20, 50, 100, 200])
+    parser.add_argument("--num-threads", type=_int_list, default=[os.cpu_count() or 1])
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", default=None,
+                        help="defaults to HNSW_CONFIG_PATH or <chroma_dir>/hnsw_tuned.json")
+    args = parser.parse_args()
+
+    settings = get_settings(require_api_key=False)
+    root = Path(__file__).resolve().parents[1]
+    data_dir = root / "data"
+    rng = random.Random(args.seed)
+
+    df = load_joined_dataset(data_dir / "restaurants.json", data_dir / "menu.json")
+    docs = build_docs_from_df(df)
+    rng.shuffle(docs)
+
+    sample = docs[: args.sample_size]
+    held_out = docs[args.sample_size:] or docs
+    queries = _load_queries(args.queries, held_out, args.num_queries, rng)
+    if not sample or not queries:
+        raise SystemExit("Not enough data to tune (empty sample or query set).")
+
+    ## embeddings are computed once and reused for every trial ...
+    doc_emb = np.asarray(embed_texts([d.text for d in sample]), dtype=np.float32)
+    q_emb = np.asarray(embed_texts(queries), dtype=np.float32)
+    k = min(args.k, len(sample))
+
+    ## exact top-k by brute force is the ground truth for recall ...
+    exact_scores = q_emb @ doc_emb.T
+    exact_top = np.argsort(-exact_scores, axis=1)[:, :k]
+    ids = [d.doc_id for d in sample]
+    exact_sets = [{ids[j] for j in row} for row in exact_top]
+
+    ## throwaway local store for the trial collections (never the shared index server) ...
+    tuning_dir = tempfile.mkdtemp(prefix="hnsw_tuning_")
+    local = replace(settings, chroma_server_url=None)
+    client = get_chroma_client(tuning_dir, local)
+    results: list[dict] = []
+
+    try:
+        ## one build per (M, construction_ef, threads); every search_ef is measured on that same
+        ## graph (collection.modify + re-open), so the sweep costs |build grid| builds, not |full grid| ...
+        for m, cef, threads in itertools.product(args.m, args.construction_ef, args.num_threads):
+            name = f"hnsw_tune_{uuid.uuid4().hex[:8]}"
+            meta = hnsw_metadata(m=m, construction_ef=cef, search_ef=args.search_ef[0], num_threads=threads)
+
+            t0 = time.perf_counter()
+            col = client.create_collection(name=name, metadata=meta)
+            for i in range(0, len(sample), 1024):
+                col.add(
+                    ids=ids[i:i+1024],
+                    embeddings=doc_emb[i:i+1024].tolist(),
+                )
+            build_s = time.perf_counter() - t0
+
+            for sef in args.search_ef:
+                col.modify(configuration={"hnsw": {"ef_search": sef}})
+                client, col = _reopen(tuning_dir, local, name)
+                ## first query loads the graph from disk, keep it out of the latencies ...
+                col.query(query_embeddings=[q_emb[0].tolist()], n_results=k, include=[])
+                latencies: list[float] = []
+                hits = 0
+                for qi, qv in enumerate(q_emb):
+                    t1 = time.perf_counter()
+                    res = col.query(query_embeddings=[qv.tolist()], n_results=k, include=[])
+                    latencies.append((time.perf_counter() - t1) * 1000.0)
+                    got = set((res.get("ids") or [[]])[0])
+                    hits += len(got & exact_sets[qi])
+
+                row = {
+                    "params": {"m": m, "construction_ef": cef, "search_ef": sef, "num_threads": threads},
+                    "recall": hits / float(k * len(queries)),
+                    "p50_ms": statistics.median(latencies),
+                    "p95_ms": _percentile(latencies, 0.95),
+                    "build_s": build_s,
+                }
+                results.append(row)
+                print(
+                    f"M={m:<3} cef={cef:<4} sef={sef:<4} threads={threads:<3} "
+                    f"recall@{k}={row['recall']:.3f} p50={row['p50_ms']:.2f}ms "
+                    f"p95={row['p95_ms']:.2f}ms build={build_s:.2f}s"
+                )
+
+            client.delete_collection(name)
+    finally:
+        shutil.rmtree(tuning_dir, ignore_errors=True)
+
+    front = _pareto_front(results)
+    best = _choose(front, args.target_recall)
+
+    out_path = Path(args.output) if args.output else hnsw_config_path(settings.chroma_dir)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(
+        json.dumps(
+            {
+                "params": best["params"],
+                "target_recall": args.target_recall,
+                "k": k,
+                "sample_size": len(sample),
+                "num_queries": len(queries),
+                "selected": best,
+                "pareto": front,
+            },
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+
+    print(f"\n✅ Pareto front has {len(front)} configs; selected {best['params']}")
+    print(f"   recall@{k}={best['recall']:.3f} p50={best['p50_ms']:.2f}ms build={best['build_s']:.2f}s")
+    print(f"   Written to: {out_path} (picked up by get_settings on the next build)")
+
+if __name__ == "__main__":
+    main()
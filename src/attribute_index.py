@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+## categorical metadata fields with one bitset per (lower-cased) value ...
+BITMAP_FIELDS = ["veg", "spice_level", "location", "cuisine_type", "restaurant_id", "restaurant_name"]
+## numeric fields kept as sorted arrays for range predicates ...
+RANGE_FIELDS = ["price", "delivery_time_minutes"]
+
+def _key(field_name: str, value: Any) -> str:
+    if field_name == "veg":
+        return "none" if value is None else ("true" if bool(value) else "false")
+    return str(value).strip().lower()
+
+@dataclass
+class AttributeIndex:
+    """Packed per-value bitsets + sorted range arrays over the indexed docs (same order as the build).
+
+    Any filter combination resolves to an allowed-position bitmap with a handful of vectorized
+    ANDs over `n / 8` bytes, which can then restrict the vector search.
+    """
+
+    doc_ids: np.ndarray
+    item_ids: np.ndarray
+    ## field -> value -> row in `bitmaps[field]`
+    vocab: dict[str, dict[str, int]]
+    ## field -> (n_values, ceil(n / 8)) uint8
+    bitmaps: dict[str, np.ndarray]
+    ## field -> (sorted values, doc positions in that order)
+    ranges: dict[str, tuple[np.ndarray, np.ndarray]]
+
+    @property
+    def size(self) -> int:
+        return int(len(self.doc_ids))
+
+    @classmethod
+    def build(cls, docs: Iterable) -> "AttributeIndex":
+        docs = list(docs)
+        n = len(docs)
+        vocab: dict[str, dict[str, int]] = {}
+        bitmaps: dict[str, np.ndarray] = {}
+        ## byte and (packbits, big-endian) bit of every doc position ...
+        pos = np.arange(n, dtype=np.int64)
+        byte, bit = pos >> 3, (0x80 >> (pos & 7)).astype(np.uint8)
+        for f in BITMAP_FIELDS:
+            keys = [_key(f, d.metadata.get(f)) for d in docs]
+            values = {v: i for i, v in enumerate(sorted(set(keys)))}
+            codes = np.fromiter((values[k] for k in keys), dtype=np.int64, count=n)
+            ## set bits straight into the packed rows, no dense (n_values, n) bool matrix ...
+            packed = np.zeros((len(values), (n + 7) // 8), dtype=np.uint8)
+            np.bitwise_or.at(packed, (codes, byte), bit)
+            vocab[f] = values
+            bitmaps[f] = packed
+
+        ranges = {}
+        for f in RANGE_FIELDS:
+            vals = np.asarray([float(d.metadata.get(f, 0) or 0) for d in docs], dtype=np.float64)
+            order = np.argsort(vals, kind="stable")
+            ranges[f] = (vals[order], order.astype(np.int64))
+
+        return cls(
+            doc_ids=np.asarray([d.doc_id for d in docs]),
+            item_ids=np.asarray([int(d.metadata.get("item_id", 0)) for d in docs], dtype=np.int64),
+            vocab=vocab,
+            bitmaps=bitmaps,
+            ranges=ranges,
+        )
+
+    ## ----- predicates (all return packed bitsets) -----
+
+    def all_bits(self) -> np.ndarray:
+        return np.packbits(np.ones(self.size, dtype=bool))
+
+    def _none(self) -> np.ndarray:
+        return np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def equals(self, field_name: str, *values: Any) -> np.ndarray:
+        ## OR over the requested values of one field ...
+        out = self._none()
+        table = self.vocab.get(field_name, {})
+        for v in values:
+            row = table.get(_key(field_name, v))
+            if row is not None:
+                out |= self.bitmaps[field_name][row]
+        return out
+
+    def at_most(self, field_name: str, upper: float) -> np.ndarray:
+        sorted_vals, order = self.ranges[field_name]
+        cut = int(np.searchsorted(sorted_vals, float(upper), side="right"))
+        mask = np.zeros(self.size, dtype=bool)
+        mask[order[:cut]] = True
+        return np.packbits(mask)
+
+    def resolve(
+        self,
+        filters: dict[str, Any],
+        user_location: Optional[str] = None,
+        include_price: bool = False,
+    ) -> np.ndarray:
+        """Hard filters of the re-ranker as a packed bitmap (price is a soft penalty unless asked)."""
+        bits = self.all_bits()
+        if filters.get("restaurant_name"):
+            bits &= self.equals("restaurant_name", filters["restaurant_name"])
+        loc = user_location or filters.get("location")
+        if loc:
+            bits &= self.equals("location", loc)
+        if filters.get("veg") is not None:
+            ## items with unknown veg status pass the veg filter in the re-ranker too ...
+            bits &= self.equals("veg", bool(filters["veg"]), None)
+        if filters.get("spice_level"):
+            bits &= self.equals("spice_level", filters["spice_level"])
+        if filters.get("cuisine_type"):
+            bits &= self.equals("cuisine_type", filters["cuisine_type"])
+        if filters.get("restaurant_id") is not None:
+            bits &= self.equals("restaurant_id", filters["restaurant_id"])
+        if filters.get("max_delivery_time_minutes") is not None:
+            bits &= self.at_most("delivery_time_minutes", filters["max_delivery_time_minutes"])
+        if include_price and filters.get("max_price") is not None:
+            bits &= self.at_most("price", filters["max_price"])
+        return bits
+
+    def positions(self, bits: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bits, count=self.size))
+
+    def count(self, bits: np.ndarray) -> int:
+        return int(np.unpackbits(bits, count=self.size).sum())
+
+    ## ----- persistence -----
+
+    def save(self, path: str | Path) -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "doc_ids": self.doc_ids,
+            "item_ids": self.item_ids,
+            "vocab": np.asarray(json.dumps(self.vocab)),
+        }
+        for f, m in self.bitmaps.items():
+            arrays[f"bitmap__{f}"] = m
+        for f, (vals, order) in self.ranges.items():
+            arrays[f"range_values__{f}"] = vals
+            arrays[f"range_order__{f}"] = order
+        with open(p, "wb") as fh:
+            np.savez(fh, **arrays)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "AttributeIndex":
+        with np.load(path, allow_pickle=False) as data:
+            vocab = json.loads(str(data["vocab"]))
+            return cls(
+                doc_ids=data["doc_ids"],
+                item_ids=data["item_ids"],
+                vocab=vocab,
+                bitmaps={f: data[f"bitmap__{f}"] for f in vocab},
+                ranges={
+                    f: (data[f"range_values__{f}"], data[f"range_order__{f}"])
+                    for f in RANGE_FIELDS if f"range_values__{f}" in data.files
+                },
+            )
+
+@lru_cache(maxsize=8)
+def _load_cached(path: str, mtime_ns: int) -> AttributeIndex:
+    return AttributeIndex.load(path)
+
+def load_attribute_index(path: str | Path) -> Optional[AttributeIndex]:
+    p = Path(path)
+    try:
+        mtime_ns = p.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _load_cached(str(p), mtime_ns)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+class LRUCache:
+    """Small thread-safe LRU map with hit/miss counters (shared by Streamlit script runs)."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+_WS_RE = re.compile(r"\s+")
+
+def normalize_query(text: str) -> str:
+    ## "  Spicy  Paneer! " and "spicy paneer" are the same request ...
+    return _WS_RE.sub(" ", str(text or "").strip().lower()).strip(" .!?")
+
+def canonical_filters(filters: Optional[dict[str, Any]]) -> str:
+    ## drop unset filters, lower-case strings, stable key order ...
+    out = {}
+    for k, v in (filters or {}).items():
+        if v is None or v == "":
+            continue
+        out[k] = v.strip().lower() if isinstance(v, str) else v
+    return json.dumps(out, sort_keys=True, default=str)
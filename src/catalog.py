@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+
+## Chroma document id of an item ...
+DOC_ID_PREFIX = "item_"
+
+def doc_id_for(item_id: int) -> str:
+    return f"{DOC_ID_PREFIX}{int(item_id)}"
+
+## repeated strings -> one shared value table + small integer codes per item
+CATEGORICAL_FIELDS = ["item_name", "category", "spice_level", "restaurant_name", "cuisine_type", "price_range", "location"]
+## numeric metadata -> one typed array each (missing values get the re-ranker's defaults)
+NUMERIC_FIELDS = {
+    "item_id": (np.int64, 0),
+    "restaurant_id": (np.int32, 0),
+    "price": (np.float64, 0.0),
+    "calories": (np.int32, 0),
+    "average_rating": (np.float64, 0.0),
+    "delivery_time_minutes": (np.int32, 999),
+    "popularity_score": (np.int32, 0),
+}
+## True / False / None as int8 1 / 0 / -1
+TRISTATE_FIELDS = ["veg", "is_chef_special", "is_pure_veg"]
+
+FIELDS = [*NUMERIC_FIELDS, *CATEGORICAL_FIELDS, *TRISTATE_FIELDS]
+
+def _code_dtype(n_values: int) -> np.dtype:
+    for dt in (np.uint8, np.uint16, np.uint32):
+        if n_values <= np.iinfo(dt).max + 1:
+            return np.dtype(dt)
+    return np.dtype(np.uint64)
+
+def _tristate(v: Any) -> int:
+    return -1 if v is None else int(bool(v))
+
+class ItemView:
+    """Read-only record view of one catalog row; quacks like the metadata dict (`.get` / `[]`).
+
+    Holds only the store and a row number, so thousands of candidates cost a few dozen bytes
+    each, and string fields are the store's shared value objects.
+    """
+
+    __slots__ = ("_store", "_pos")
+
+    def __init__(self, store: CatalogStore, pos: int) -> None:
+        self._store = store
+        self._pos = pos
+
+    def get(self, key: str, default: Any = None) -> Any:
+        s = self._store
+        if key in s.codes:
+            return s.values[key][s.codes[key][self._pos]]
+        if key in s.numeric:
+            return s.numeric[key][self._pos].item()
+        if key in s.tristate:
+            t = int(s.tristate[key][self._pos])
+            return None if t < 0 else bool(t)
+        return default
+
+    ## membership follows the columns the store actually holds (an older artifact may lack some) ...
+    def __getitem__(self, key: str) -> Any:
+        if key not in self:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __contains__(self, key: object) -> bool:
+        return self._store.has_field(key)
+
+    def keys(self) -> list[str]:
+        return self._store.fields()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {f: self.get(f) for f in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"ItemView({self.to_dict()!r})"
+
+@dataclass
+class CatalogStore:
+    """Column store of the indexed items: categorical codes, typed numeric arrays, tri-state bools.
+
+    Rows are in index build order (same as the attribute index), `position()` maps Chroma ids back.
+    """
+
+    ## field -> codes into values[field]
+    codes: dict[str, np.ndarray]
+    ## field -> distinct values (interned, shared by every view)
+    values: dict[str, list[str]]
+    numeric: dict[str, np.ndarray]
+    tristate: dict[str, np.ndarray]
+
+    def __post_init__(self) -> None:
+        ## item ids sorted once for id -> row lookups without a per-item dict ...
+        ids = self.numeric["item_id"]
+        self._order = np.argsort(ids, kind="stable")
+        self._sorted_ids = ids[self._order]
+
+    def __len__(self) -> int:
+        return int(len(self.numeric["item_id"]))
+
+    def has_field(self, key: object) -> bool:
+        return key in self.codes or key in self.numeric or key in self.tristate
+
+    def fields(self) -> list[str]:
+        """Loaded columns, in FIELDS order."""
+        return [f for f in FIELDS if self.has_field(f)]
+
+    @classmethod
+    def from_metadatas(cls, metas: Iterable[dict]) -> "CatalogStore":
+        metas = list(metas)
+        n = len(metas)
+        codes, values = {}, {}
+        for f in CATEGORICAL_FIELDS:
+            raw = [str(m.get(f, "") if m.get(f) is not None else "") for m in metas]
+            table: dict[str, int] = {}
+            for v in raw:
+                if v not in table:
+                    table[v] = len(table)
+            values[f] = [sys.intern(v) for v in table]
+            codes[f] = np.fromiter((table[v] for v in raw), dtype=_code_dtype(len(table)), count=n)
+        numeric = {
+            f: np.asarray([m.get(f) if m.get(f) is not None else default for m in metas], dtype=dt)
+            for f, (dt, default) in NUMERIC_FIELDS.items()
+        }
+        tristate = {f: np.asarray([_tristate(m.get(f)) for m in metas], dtype=np.int8) for f in TRISTATE_FIELDS}
+        return cls(codes=codes, values=values, numeric=numeric, tristate=tristate)
+
+    ## ----- access -----
+
+    def view(self, pos: int) -> ItemView:
+        return ItemView(self, int(pos))
+
+    def __iter__(self) -> Iterator[ItemView]:
+        return (ItemView(self, i) for i in range(len(self)))
+
+    def position(self, doc_id: str) -> Optional[int]:
+        try:
+            item_id = int(str(doc_id)[len(DOC_ID_PREFIX):])
+        except ValueError:
+            return None
+        i = int(np.searchsorted(self._sorted_ids, item_id))
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == item_id:
+            return int(self._order[i])
+        return None
+
+    def views_for_ids(self, doc_ids: Iterable[str]) -> Optional[list[ItemView]]:
+        """Views in the order of `doc_ids`; None if any id is unknown (caller falls back to Chroma)."""
+        out = []
+        for d in doc_ids:
+            p = self.position(d)
+            if p is None:
+                return None
+            out.append(ItemView(self, p))
+        return out
+
+    ## ----- memory accounting -----
+
+    def memory_report(self) -> dict[str, int]:
+        """Bytes held per column (arrays + distinct strings), plus the id lookup arrays."""
+        report = {}
+        for f in CATEGORICAL_FIELDS:
+            report[f] = int(self.codes[f].nbytes) + sum(sys.getsizeof(v) for v in self.values[f]) \
+                + sys.getsizeof(self.values[f])
+        for f, arr in {**self.numeric, **self.tristate}.items():
+            report[f] = int(arr.nbytes)
+        report["_id_lookup"] = int(self._order.nbytes + self._sorted_ids.nbytes)
+        return report
+
+    def nbytes(self) -> int:
+        return sum(self.memory_report().values())
+
+    ## ----- persistence -----
+
+    def save(self, path: str | Path) -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {"values": np.asarray(json.dumps(self.values))}
+        for f, a in self.codes.items():
+            arrays[f"code__{f}"] = a
+        for f, a in self.numeric.items():
+            arrays[f"num__{f}"] = a
+        for f, a in self.tristate.items():
+            arrays[f"tri__{f}"] = a
+        with open(p, "wb") as fh:
+            np.savez(fh, **arrays)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CatalogStore":
+        with np.load(path, allow_pickle=False) as data:
+            values = {f: [sys.intern(v) for v in vs] for f, vs in json.loads(str(data["values"])).items()}
+            return cls(
+                codes={f: data[f"code__{f}"] for f in values},
+                values=values,
+                numeric={f: data[f"num__{f}"] for f in NUMERIC_FIELDS if f"num__{f}" in data.files},
+                tristate={f: data[f"tri__{f}"] for f in TRISTATE_FIELDS if f"tri__{f}" in data.files},
+            )
+
+@lru_cache(maxsize=8)
+def _load_cached(path: str, mtime_ns: int) -> CatalogStore:
+    return CatalogStore.load(path)
+
+def load_catalog(path: str | Path) -> Optional[CatalogStore]:
+    p = Path(path)
+    try:
+        mtime_ns = p.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _load_cached(str(p), mtime_ns)
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import json
 import os
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+## "torch" = sentence-transformers (PyTorch), "onnx" / "onnx-int8" = onnxruntime export
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+## item embedding strategies of the index build (see `indexer.embed_docs`)
+EMBEDDING_MODES = ("per_item", "factorized")
+## texts per model forward pass, shared by Settings, `embed_texts` and the index build ...
+DEFAULT_EMBED_BATCH_SIZE = 64
+
 @dataclass(frozen=True)
 class Settings:
     google_api_key: str
@@ -13,16 +23,151 @@ class Settings:
     gemini_model: str
     collection_name: str = "menu_items_v1"
 
-def get_settings() -> Settings:
+    ## shared index server (e.g. scripts/index_server.py); None = each process opens chroma_dir itself ...
+    chroma_server_url: Optional[str] = None
+    chroma_pool_size: int = 16
+
+    ## HNSW index parameters (None keeps Chroma's default) ...
+    ## M / construction_ef are fixed at build time, search_ef / num_threads affect queries.
+    hnsw_m: Optional[int] = None
+    hnsw_construction_ef: Optional[int] = None
+    hnsw_search_ef: Optional[int] = None
+    hnsw_num_threads: Optional[int] = None
+
+    ## index build: encode worker processes and per-forward-pass batch size ...
+    embed_workers: int = 1
+    embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE
+    ## "per_item" encodes every item text, "factorized" composes items from shared dish/restaurant parts
+    embedding_mode: str = "per_item"
+
+    ## query/document encoder: "torch" | "onnx" | "onnx-int8" (see scripts/export_onnx.py) ...
+    embedding_backend: str = "torch"
+    onnx_model_dir: str = "models/onnx"
+
+    ## semantic near-duplicate query cache (None = disabled), cosine threshold + entries kept ...
+    semantic_cache_threshold: Optional[float] = None
+    semantic_cache_size: int = 512
+
+    ## result diversity: items per restaurant in the top-k (None = no cap) and
+    ## one item per dish name within a restaurant ...
+    max_per_restaurant: Optional[int] = None
+    dedup_dishes: bool = False
+
+    ## Gemini calls: total deadline per call (all retries), in-flight limit, retries,
+    ## hedge delay (None = no hedging) and an alternative endpoint (e.g. a local fake server) ...
+    llm_timeout_s: float = 8.0
+    llm_max_concurrency: int = 8
+    llm_max_retries: int = 2
+    llm_hedge_after_s: Optional[float] = None
+    gemini_base_url: Optional[str] = None
+
+    ## anonymized query log (None = off) and how many of its top queries the warm-up replays ...
+    query_log_path: Optional[str] = None
+    warmup_top_n: int = 0
+    ## the app warms up in the background; queries not started within this many seconds are skipped
+    warmup_deadline_s: float = 60.0
+
+    ## fraction of requests profiled with cProfile (0 = off) and where the profiles go ...
+    profile_rate: float = 0.0
+    profile_dir: str = "profiles"
+
+def _optional_int(value: Any) -> Optional[int]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+def _optional_float(value: Any) -> Optional[float]:
+    if value is None or not str(value).strip():
+        return None
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return None
+
+## relative CHROMA_DIRs are relative to the project root (as in the scripts), not to the cwd ...
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+def hnsw_config_path(chroma_dir: str) -> Path:
+    """Where `scripts/tune_hnsw.py` writes and `get_settings` reads the tuned HNSW config."""
+    explicit = os.getenv("HNSW_CONFIG_PATH", "").strip()
+    return PROJECT_ROOT / (explicit or Path(chroma_dir) / "hnsw_tuned.json")
+
+def load_hnsw_overrides(path: str | Path) -> dict[str, int]:
+    """Read the tuned HNSW config written by `scripts/tune_hnsw.py` (empty dict if missing)."""
+    p = Path(path)
+    if not p.exists():
+        return {}
+    try:
+        data = json.loads(p.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    params = data.get("params") or {}
+    out: dict[str, int] = {}
+    for k in ["m", "construction_ef", "search_ef", "num_threads"]:
+        v = _optional_int(params.get(k))
+        if v is not None:
+            out[k] = v
+    return out
+
+def get_settings(require_api_key: bool = True) -> Settings:
+    ## library code (Chroma client, embeddings) reads its config here too, without needing a key ...
     api_key = os.getenv("GOOGLE_API_KEY", "").strip()
-    if not api_key:
+    if require_api_key and not api_key:
         raise RuntimeError("Missing GOOGLE_API_KEY. Put it in .env (see .env.example).")
 
     chroma_dir = os.getenv("CHROMA_DIR", "chroma").strip() or "chroma"
     gemini_model = os.getenv("GEMINI_MODEL", "models/gemini-2.5-flash").strip() or "models/gemini-2.5-flash"
 
+    ## tuned values from the tuner file, explicit env vars always win ...
+    tuned = load_hnsw_overrides(hnsw_config_path(chroma_dir))
+
+    def _hnsw(env_name: str, key: str) -> Optional[int]:
+        v = _optional_int(os.getenv(env_name))
+        return v if v is not None else tuned.get(key)
+
+    embedding_backend = os.getenv("EMBEDDING_BACKEND", "torch").strip().lower() or "torch"
+    if embedding_backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND={embedding_backend!r}; expected one of {EMBEDDING_BACKENDS}.")
+    embedding_mode = os.getenv("EMBEDDING_MODE", "per_item").strip().lower() or "per_item"
+    if embedding_mode not in EMBEDDING_MODES:
+        raise ValueError(f"Unknown EMBEDDING_MODE={embedding_mode!r}; expected one of {EMBEDDING_MODES}.")
+
+    ## 0 is a valid retry count, so no `or` default here ...
+    llm_max_retries = _optional_int(os.getenv("LLM_MAX_RETRIES"))
+
     return Settings(
         google_api_key=api_key,
         chroma_dir=chroma_dir,
         gemini_model=gemini_model,
+        chroma_server_url=os.getenv("CHROMA_SERVER_URL", "").strip() or None,
+        chroma_pool_size=max(1, _optional_int(os.getenv("CHROMA_POOL_SIZE")) or 16),
+        hnsw_m=_hnsw("HNSW_M", "m"),
+        hnsw_construction_ef=_hnsw("HNSW_CONSTRUCTION_EF", "construction_ef"),
+        hnsw_search_ef=_hnsw("HNSW_SEARCH_EF", "search_ef"),
+        hnsw_num_threads=_hnsw("HNSW_NUM_THREADS", "num_threads"),
+        embed_workers=_optional_int(os.getenv("EMBED_WORKERS")) or 1,
+        embed_batch_size=_optional_int(os.getenv("EMBED_BATCH_SIZE")) or DEFAULT_EMBED_BATCH_SIZE,
+        embedding_mode=embedding_mode,
+        embedding_backend=embedding_backend,
+        onnx_model_dir=os.getenv("ONNX_MODEL_DIR", "models/onnx").strip() or "models/onnx",
+        semantic_cache_threshold=_optional_float(os.getenv("SEMANTIC_CACHE_THRESHOLD")),
+        semantic_cache_size=_optional_int(os.getenv("SEMANTIC_CACHE_SIZE")) or 512,
+        max_per_restaurant=_optional_int(os.getenv("MAX_PER_RESTAURANT")),
+        dedup_dishes=os.getenv("DEDUP_DISHES", "").strip().lower() in {"1", "true", "yes"},
+        llm_timeout_s=_optional_float(os.getenv("LLM_TIMEOUT_S")) or 8.0,
+        llm_max_concurrency=_optional_int(os.getenv("LLM_MAX_CONCURRENCY")) or 8,
+        llm_max_retries=llm_max_retries if llm_max_retries is not None else 2,
+        llm_hedge_after_s=_optional_float(os.getenv("LLM_HEDGE_AFTER_S")),
+        gemini_base_url=os.getenv("GEMINI_BASE_URL", "").strip() or None,
+        query_log_path=os.getenv("QUERY_LOG_PATH", "").strip() or None,
+        warmup_top_n=_optional_int(os.getenv("WARMUP_TOP_N")) or 0,
+        warmup_deadline_s=_optional_float(os.getenv("WARMUP_DEADLINE_S")) or 60.0,
+        profile_rate=min(1.0, max(0.0, _optional_float(os.getenv("PROFILE_RATE")) or 0.0)),
+        profile_dir=os.getenv("PROFILE_DIR", "profiles").strip() or "profiles",
     )
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import heapq
+import re
+from typing import TYPE_CHECKING, Optional, Sequence
+
+if TYPE_CHECKING:
+    from .retriever import Recommendation
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+def dish_key(name: str) -> str:
+    ## "Paneer Curry", "paneer-curry " and "PANEER CURRY!" are the same dish ...
+    return _NON_ALNUM_RE.sub(" ", str(name or "").lower()).strip()
+
+def diversified_top_k(
+    recs: Sequence[Recommendation],
+    k: int,
+    *,
+    max_per_restaurant: Optional[int] = None,
+    dedup_dishes: bool = False,
+) -> list[Recommendation]:
+    """Best `k` recommendations by final score, at most `max_per_restaurant` per restaurant and
+    (with `dedup_dishes`) one item per dish name within a restaurant.
+
+    `recs` need not be sorted: they are heapified in O(n) and popped best-first until `k` are
+    accepted, so only the candidates actually inspected pay the O(log n) pop.
+    """
+    if k <= 0 or not recs:
+        return []
+    ## index as tie-breaker keeps equal scores in input order and never compares Recommendations ...
+    heap = [(-r.final_score, i) for i, r in enumerate(recs)]
+    heapq.heapify(heap)
+
+    per_restaurant: dict[int, int] = {}
+    seen_dishes: set[tuple[int, str]] = set()
+    out: list[Recommendation] = []
+    while heap and len(out) < k:
+        _, i = heapq.heappop(heap)
+        r = recs[i]
+        if max_per_restaurant is not None and per_restaurant.get(r.restaurant_id, 0) >= max_per_restaurant:
+            continue
+        if dedup_dishes:
+            key = (r.restaurant_id, dish_key(r.item_name))
+            if key in seen_dishes:
+                continue
+            seen_dishes.add(key)
+        per_restaurant[r.restaurant_id] = per_restaurant.get(r.restaurant_id, 0) + 1
+        out.append(r)
+    return out
@@ -1,18 +1,114 @@
 from __future__ import annotations
 
+import logging
+import os
+from contextlib import contextmanager
 from functools import lru_cache
-from sentence_transformers import SentenceTransformer
+from typing import Any, Iterator, Optional
+import numpy as np
+
+from .config import DEFAULT_EMBED_BATCH_SIZE, EMBEDDING_BACKENDS, get_settings
+
+logger = logging.getLogger(__name__)
+
+## backend and ONNX directory come from Settings (EMBEDDING_BACKEND / ONNX_MODEL_DIR, validated there) ...
+def default_backend() -> str:
+    return get_settings(require_api_key=False).embedding_backend
+
+def default_onnx_dir() -> str:
+    return get_settings(require_api_key=False).onnx_model_dir
+
+## recorded in exported index artifacts; vectors from different models are not comparable ...
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
 
-@lru_cache(maxsize=1)
 ### deffault model is all-MiniLM-L6-v2 which is a small model for fast inference ...
 ### with embedding length of 384 ...
-def get_embedding_model(model_name: str = "all-MiniLM-L6-v2") -> SentenceTransformer:
-    return SentenceTransformer(model_name)
+def get_embedding_model(model_name: str = DEFAULT_MODEL_NAME, backend: Optional[str] = None) -> Any:
+    ## resolved before the cache, so backend=None and the configured backend share one model ...
+    return _load_embedding_model(model_name, backend or default_backend())
+
+@lru_cache(maxsize=4)
+def _load_embedding_model(model_name: str, backend: str) -> Any:
+    if backend == "torch":
+        ## torch is only imported when the PyTorch backend is actually used ...
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+
+    from .onnx_embedder import OnnxEmbedder
+    return OnnxEmbedder(default_onnx_dir(), quantized=(backend == "onnx-int8"))
+
+## below this many texts per worker the pool start-up cost outweighs the gain ...
+_MIN_TEXTS_PER_WORKER = 256
+
+def _normalize_rows(emb: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return emb / norms
+
+@contextmanager
+def _worker_threads(n: int) -> Iterator[None]:
+    ## spawned workers inherit the environment at start-up and torch sizes its intra-op pool from
+    ## OMP_NUM_THREADS, so N workers share the cores instead of each starting one thread per core ...
+    saved = {k: os.environ.get(k) for k in ("OMP_NUM_THREADS", "MKL_NUM_THREADS")}
+    os.environ.update({k: str(n) for k in saved})
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+def _encode_multi_process(texts: list[str], *, num_workers: int, batch_size: int) -> np.ndarray:
+    from sentence_transformers import SentenceTransformer
+
+    ## sentence-transformers spawns one process per target device and feeds it chunks
+    ## through a queue, so every core encodes its own share of the batch ...
+    model = get_embedding_model(backend="torch")
+    with _worker_threads(max(1, (os.cpu_count() or 1) // num_workers)):
+        pool = model.start_multi_process_pool(target_devices=["cpu"] * num_workers)
+    try:
+        chunk_size = max(batch_size, -(-len(texts) // (num_workers * 4)))
+        emb = model.encode_multi_process(texts, pool, batch_size=batch_size, chunk_size=chunk_size)
+    finally:
+        SentenceTransformer.stop_multi_process_pool(pool)
+    return _normalize_rows(np.asarray(emb, dtype=np.float32))
+
+def embed_texts(
+    texts: list[str], *, batch_size: int = DEFAULT_EMBED_BATCH_SIZE, num_workers: int = 1
+) -> list[list[float]]:
+    """Normalized embeddings of `texts`.
+
+    `num_workers` > 1 encodes across a process pool (torch backend only), capped so that every
+    worker gets at least 256 unique texts; the cap, and workers ignored by ONNX, are logged.
+    """
+    if not texts:
+        return []
+
+    ## exact duplicates are encoded once and scattered back to every position ...
+    unique = list(dict.fromkeys(texts))
+    requested = max(1, int(num_workers))
+    workers = min(requested, max(1, len(unique) // _MIN_TEXTS_PER_WORKER))
+    if workers < requested:
+        logger.info(
+            "embed_texts: %d unique texts -> %d of %d requested workers (>= %d texts per worker)",
+            len(unique), workers, requested, _MIN_TEXTS_PER_WORKER,
+        )
+    backend = default_backend()
+    if workers > 1 and backend != "torch":
+        logger.info("embed_texts: %s backend encodes in-process, ignoring %d workers", backend, workers)
+        workers = 1
+    if workers > 1:
+        emb = _encode_multi_process(unique, num_workers=workers, batch_size=batch_size)
+    else:
+        model = get_embedding_model(backend=backend)
+        emb = np.asarray(model.encode(unique, batch_size=batch_size, show_progress_bar=False, normalize_embeddings=True))
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
-    model = get_embedding_model()
-    emb = model.encode(texts, show_progress_bar=False, normalize_embeddings=True)
-    return emb.tolist()
+    if len(unique) == len(texts):
+        return emb.tolist()
+    row = {t: i for i, t in enumerate(unique)}
+    return emb[[row[t] for t in texts]].tolist()
 
 def embed_text(text: str) -> list[float]:
     return embed_texts([text])[0]
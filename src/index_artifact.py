@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from .indexer import ATTRIBUTE_INDEX_FILE, CATALOG_FILE, LEXICAL_INDEX_FILE, SCORE_STATS_FILE, artifact_path
+
+## single-file layout:
+##   MAGIC | uint32 format version | uint64 header length | JSON header | padding | sections ...
+## every section starts on an ALIGNMENT boundary so the embedding matrix can be memory mapped.
+MAGIC = b"DHINDEX\x00"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+ARTIFACT_SUFFIX = ".dhidx"
+
+## side-index files shipped with the vectors (entity vocabularies live in the attribute
+## index / lexical postings, score statistics in their own JSON) ...
+SIDE_FILES = (LEXICAL_INDEX_FILE, ATTRIBUTE_INDEX_FILE, SCORE_STATS_FILE, CATALOG_FILE)
+
+_PREAMBLE = struct.Struct("<8sIQ")
+
+class ArtifactError(ValueError):
+    """Raised for unreadable, corrupt or incompatible index artifacts."""
+
+def _sha256(data) -> str:
+    h = hashlib.sha256()
+    h.update(memoryview(data).cast("B"))
+    return h.hexdigest()
+
+def file_sha256(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _pad(n: int) -> int:
+    return -n % ALIGNMENT
+
+@dataclass
+class IndexArtifact:
+    """A loaded artifact: header plus memory-mapped sections (nothing is copied until used)."""
+
+    path: Path
+    header: dict[str, Any]
+    _mm: np.memmap
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        s = self.header["sections"]["embeddings"]
+        return np.ndarray(
+            tuple(s["shape"]), dtype=np.dtype(s["dtype"]), buffer=self._mm, offset=s["offset"]
+        )
+
+    def section_bytes(self, name: str) -> bytes:
+        s = self.header["sections"][name]
+        return self._mm[s["offset"]:s["offset"] + s["nbytes"]].tobytes()
+
+    def section_json(self, name: str) -> Any:
+        return json.loads(self.section_bytes(name).decode("utf-8"))
+
+    def side_files(self) -> dict[str, bytes]:
+        return {name: self.section_bytes(f"file:{name}") for name in self.header.get("files", [])}
+
+    def verify(self) -> None:
+        for name, s in self.header["sections"].items():
+            got = _sha256(self._mm[s["offset"]:s["offset"] + s["nbytes"]])
+            if got != s["sha256"]:
+                raise ArtifactError(f"Checksum mismatch in section {name!r} of {self.path}.")
+
+def _collection_rows(col, page_size: int = 1000) -> tuple[list[str], list[str], list[dict], np.ndarray]:
+    ids: list[str] = []
+    documents: list[str] = []
+    metadatas: list[dict] = []
+    vectors: list[np.ndarray] = []
+    offset = 0
+    while True:
+        page = col.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+        page_ids = page.get("ids") or []
+        if not page_ids:
+            break
+        ids += page_ids
+        documents += list(page.get("documents") or [""] * len(page_ids))
+        metadatas += list(page.get("metadatas") or [{}] * len(page_ids))
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+        offset += len(page_ids)
+    matrix = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    return ids, documents, metadatas, matrix
+
+def export_index(
+    *,
+    persist_dir: str,
+    collection_name: str,
+    out_path: str | Path,
+    data_files: Iterable[str | Path] = (),
+    model_name: Optional[str] = None,
+) -> dict[str, Any]:
+    """Package the live version of `collection_name` into one checksummed file; returns the header."""
+    from .embeddings import DEFAULT_MODEL_NAME, default_backend
+    from .index_registry import read_registry, resolve_collection
+    from .indexer import get_chroma_client
+
+    physical = resolve_collection(persist_dir, collection_name)
+    col = get_chroma_client(persist_dir).get_collection(physical)
+    ids, documents, metadatas, matrix = _collection_rows(col)
+
+    sections: list[tuple[str, bytes | np.ndarray]] = [
+        ("embeddings", np.ascontiguousarray(matrix, dtype=np.float32)),
+        ("ids", json.dumps(ids).encode("utf-8")),
+        ("documents", json.dumps(documents).encode("utf-8")),
+        ("metadatas", json.dumps(metadatas).encode("utf-8")),
+    ]
+    files = []
+    for name in SIDE_FILES:
+        p = artifact_path(persist_dir, physical, name)
+        if p.exists():
+            sections.append((f"file:{name}", p.read_bytes()))
+            files.append(name)
+
+    entry = read_registry(persist_dir).get(collection_name) or {}
+    header: dict[str, Any] = {
+        "format_version": FORMAT_VERSION,
+        "created_at": time.time(),
+        "collection_name": collection_name,
+        "index_version": entry.get("version"),
+        "source_collection": physical,
+        "collection_metadata": dict(col.metadata or {}),
+        "model_name": model_name or DEFAULT_MODEL_NAME,
+        "embedding_backend": default_backend(),
+        "count": len(ids),
+        "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+        "data_hashes": {Path(f).name: file_sha256(f) for f in data_files},
+        "files": files,
+        "sections": {},
+    }
+
+    ## offsets are relative to the start of the file, so the header size must be known first;
+    ## placeholder offsets are fixed-width so the JSON length does not change when filling them ...
+    layout = {}
+    for name, payload in sections:
+        raw = payload.tobytes() if isinstance(payload, np.ndarray) else payload
+        layout[name] = {"offset": 0, "nbytes": len(raw), "sha256": _sha256(raw)}
+        if isinstance(payload, np.ndarray):
+            layout[name].update(dtype=payload.dtype.str, shape=list(payload.shape))
+    header["sections"] = layout
+
+    def encode_header() -> bytes:
+        return json.dumps(header, sort_keys=True).encode("utf-8")
+
+    for s in layout.values():
+        s["offset"] = 10 ** 15
+    header_len = len(encode_header())
+    pos = _PREAMBLE.size + header_len
+    pos += _pad(pos)
+    for name, _ in sections:
+        layout[name]["offset"] = pos
+        pos += layout[name]["nbytes"] + _pad(layout[name]["nbytes"])
+    blob = encode_header()
+    blob += b" " * (header_len - len(blob))
+
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, header_len))
+        fh.write(blob)
+        fh.write(b"\0" * _pad(_PREAMBLE.size + header_len))
+        for name, payload in sections:
+            raw = payload.tobytes() if isinstance(payload, np.ndarray) else payload
+            fh.write(raw)
+            fh.write(b"\0" * _pad(len(raw)))
+    tmp.replace(out)
+    return header
+
+def open_artifact(path: str | Path, *, verify: bool = True) -> IndexArtifact:
+    p = Path(path)
+    mm = np.memmap(p, dtype=np.uint8, mode="r")
+    if len(mm) < _PREAMBLE.size:
+        raise ArtifactError(f"{p} is not an index artifact.")
+    magic, version, header_len = _PREAMBLE.unpack(mm[:_PREAMBLE.size].tobytes())
+    if magic != MAGIC:
+        raise ArtifactError(f"{p} is not an index artifact.")
+    if version > FORMAT_VERSION:
+        raise ArtifactError(f"{p} uses format version {version}; this build reads up to {FORMAT_VERSION}.")
+    header = json.loads(mm[_PREAMBLE.size:_PREAMBLE.size + header_len].tobytes().decode("utf-8"))
+    for name, s in header["sections"].items():
+        if s["offset"] + s["nbytes"] > len(mm):
+            raise ArtifactError(f"{p} is truncated (section {name!r}).")
+    artifact = IndexArtifact(path=p, header=header, _mm=mm)
+    if verify:
+        artifact.verify()
+    return artifact
+
+def import_index(
+    *,
+    artifact: str | Path,
+    persist_dir: str,
+    collection_name: Optional[str] = None,
+    keep_versions: int = 2,
+    verify: bool = True,
+    expected_model: Optional[str] = None,
+) -> dict[str, Any]:
+    """Publish an exported artifact as a new version of `collection_name` (blue/green, no model needed).
+
+    The vectors are re-added to a new collection, so Chroma rebuilds the HNSW graph: this saves the
+    encoding pass, not the index build.
+    """
+    from .embeddings import DEFAULT_MODEL_NAME
+    from .indexer import IndexDoc, rebuild_collection
+
+    art = open_artifact(artifact, verify=verify)
+    header = art.header
+    model = expected_model or DEFAULT_MODEL_NAME
+    if header.get("model_name") != model:
+        ## query vectors would come from a different model than the stored document vectors ...
+        raise ArtifactError(f"Artifact was built with {header.get('model_name')!r}, this node embeds with {model!r}.")
+
+    ids = art.section_json("ids")
+    documents = art.section_json("documents")
+    metadatas = art.section_json("metadatas")
+    docs = [IndexDoc(doc_id=i, text=t, metadata=m) for i, t, m in zip(ids, documents, metadatas)]
+
+    rebuild_collection(
+        persist_dir=persist_dir,
+        collection_name=collection_name or header["collection_name"],
+        docs=docs,
+        hnsw=header.get("collection_metadata") or None,
+        embeddings=art.embeddings,
+        artifacts=art.side_files(),
+        keep_versions=keep_versions,
+    )
+    return header
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+## one small JSON file per persist dir: alias (the configured collection name) ->
+## the physical, versioned collection currently serving it
+REGISTRY_FILE = "index_registry.json"
+
+## physical collections are named "<alias>__<version>" ...
+VERSION_SEPARATOR = "__"
+
+class IndexNotReadyError(RuntimeError):
+    """Raised when no (valid) index version has been published for a collection alias."""
+
+def _registry_path(persist_dir: str) -> Path:
+    return Path(persist_dir) / REGISTRY_FILE
+
+@lru_cache(maxsize=8)
+def _read_registry_cached(path: str, mtime_ns: int, size: int) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def read_registry(persist_dir: str) -> dict:
+    ## a stat per call; the file is only re-read when a build published something new ...
+    p = _registry_path(persist_dir)
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        return {}
+    return _read_registry_cached(str(p), st.st_mtime_ns, st.st_size)
+
+def _write_registry(persist_dir: str, registry: dict) -> None:
+    p = _registry_path(persist_dir)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(f".{p.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(registry, indent=2), encoding="utf-8")
+    ## os.replace is atomic, readers see either the old or the new registry ...
+    os.replace(tmp, p)
+
+def new_index_version() -> str:
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+def versioned_collection_name(alias: str, version: str) -> str:
+    return f"{alias}{VERSION_SEPARATOR}{version}"
+
+def publish_index_version(
+    persist_dir: str,
+    collection_name: str,
+    version: Optional[str] = None,
+    physical_name: Optional[str] = None,
+) -> str:
+    """Atomically point `collection_name` (the alias) at a new physical collection."""
+    version = version or new_index_version()
+    registry = dict(read_registry(persist_dir))
+    previous = registry.get(collection_name) or {}
+    ## entries written before aliases existed point at the in-place collection named like the alias ...
+    history = [previous.get("collection") or collection_name] if previous else []
+    history += [c for c in previous.get("previous", []) if c not in history]
+    registry[collection_name] = {
+        "version": version,
+        "collection": physical_name or collection_name,
+        "published_at": time.time(),
+        ## most recent first, used by the garbage collector to keep a rollback target ...
+        "previous": history[:10],
+    }
+    _write_registry(persist_dir, registry)
+    return version
+
+def read_index_version(persist_dir: str, collection_name: str) -> Optional[str]:
+    entry = read_registry(persist_dir).get(collection_name) or {}
+    return entry.get("version")
+
+def resolve_collection(persist_dir: str, collection_name: str) -> str:
+    ## indexes built before aliases existed have no registry entry, serve them under their own name ...
+    entry = read_registry(persist_dir).get(collection_name) or {}
+    return entry.get("collection") or collection_name
+
+def retained_collections(persist_dir: str, collection_name: str, keep_versions: int) -> list[str]:
+    entry = read_registry(persist_dir).get(collection_name) or {}
+    current = [entry["collection"]] if entry.get("collection") else []
+    return (current + list(entry.get("previous", [])))[: max(1, keep_versions)]
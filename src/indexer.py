@@ -1,17 +1,29 @@
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass
-from typing import Iterable
-import chromadb
-from chromadb.config import Settings as ChromaSettings
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
 
-from .embeddings import embed_texts
+from .config import DEFAULT_EMBED_BATCH_SIZE, EMBEDDING_MODES
+
+## chromadb and the embedding model (torch) are imported on first use,
+## so importing this module stays cheap for code paths that need neither ...
+if TYPE_CHECKING:
+    import chromadb
+
+    from .config import Settings
 
 @dataclass(frozen=True)
 class IndexDoc:
     doc_id: str
     text: str
     metadata: dict
+    ## components of `text` for factorized embedding (dish / item attributes / restaurant) ...
+    dish_text: str = ""
+    attr_text: str = ""
+    restaurant_text: str = ""
 
 def _safe_float(x, default=0.0) -> float:
     try:
@@ -25,10 +37,16 @@ def _safe_int(x, default=0) -> int:
     except Exception:
         return default
 
+def _cat(row, key: str) -> str:
+    ## categorical values repeat across the catalog, keep one shared str object per distinct value ...
+    return sys.intern(str(row.get(key, "")))
+
 def build_docs_from_df(df) -> list[IndexDoc]:
+    from .catalog import doc_id_for
+
     docs: list[IndexDoc] = []
     for _, row in df.iterrows():
-        doc_id = f"item_{int(row['item_id'])}"
+        doc_id = doc_id_for(int(row["item_id"]))
 
         ### text which can be used for semantic search for query matching
 
@@ -42,70 +60,336 @@ def build_docs_from_df(df) -> list[IndexDoc]:
             f"Location: {row.get('location','')}. "
         ).strip()
 
+        ## the same text split into parts that repeat across the catalog,
+        ## so `embed_docs(..., mode="factorized")` encodes each unique part only once ...
+        dish_text = f"{row.get('item_name','')}. {row.get('description','')}."
+        attr_text = (
+            f"Category: {row.get('category','')}. "
+            f"Spice: {row.get('spice_level','')}. "
+            f"{'Vegetarian' if bool(row.get('veg')) else 'Non-vegetarian'}."
+        )
+        restaurant_text = (
+            f"Cuisine: {row.get('cuisine_type','')}. "
+            f"Restaurant: {row.get('restaurant_name','')}. "
+            f"Location: {row.get('location','')}."
+        )
+
         ## metadata which can be used for filtering and ranking ... 
         # it is some sort of deterministic attributes which can be used for filtering and ranking ...
 
         metadata = {
             "item_id": _safe_int(row.get("item_id")),
             "restaurant_id": _safe_int(row.get("restaurant_id")),
-            "item_name": str(row.get("item_name", "")),
-            "category": str(row.get("category", "")),
+            "item_name": _cat(row, "item_name"),
+            "category": _cat(row, "category"),
             "price": _safe_float(row.get("price")),
             "veg": bool(row.get("veg")) if row.get("veg") is not None else None,
-            "spice_level": str(row.get("spice_level", "")),
+            "spice_level": _cat(row, "spice_level"),
             "calories": _safe_int(row.get("calories", 0)),
             "is_chef_special": bool(row.get("is_chef_special")) if row.get("is_chef_special") is not None else False,
-            "restaurant_name": str(row.get("restaurant_name", "")),
-            "cuisine_type": str(row.get("cuisine_type", "")),
+            "restaurant_name": _cat(row, "restaurant_name"),
+            "cuisine_type": _cat(row, "cuisine_type"),
             "average_rating": _safe_float(row.get("average_rating")),
-            "price_range": str(row.get("price_range", "")),
-            "location": str(row.get("location", "")),
+            "price_range": _cat(row, "price_range"),
+            "location": _cat(row, "location"),
             "delivery_time_minutes": _safe_int(row.get("delivery_time_minutes", 999)),
             "is_pure_veg": bool(row.get("is_pure_veg")) if row.get("is_pure_veg") is not None else None,
             "popularity_score": _safe_int(row.get("popularity_score", 0)),
         }
-        docs.append(IndexDoc(doc_id=doc_id, text=text, metadata=metadata))
+        docs.append(
+            IndexDoc(
+                doc_id=doc_id,
+                text=text,
+                metadata=metadata,
+                dish_text=dish_text,
+                attr_text=attr_text,
+                restaurant_text=restaurant_text,
+            )
+        )
     return docs
 
-def get_chroma_client(persist_dir: str) -> chromadb.PersistentClient:
+## component weights of a factorized item vector (dish dominates, like in the full text) ...
+FACTOR_WEIGHTS = {"dish_text": 0.60, "attr_text": 0.15, "restaurant_text": 0.25}
+
+def embed_docs(
+    docs: list[IndexDoc],
+    *,
+    mode: str = "per_item",
+    batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    num_workers: int = 1,
+) -> list[list[float]]:
+    """Document embeddings, either one encode per item text or composed from shared components.
+
+    "factorized" embeds every unique dish / attribute / restaurant text once and builds each item
+    vector as the normalized weighted sum of its parts, which turns millions of encodes into the
+    number of distinct components.
+    """
+    import numpy as np
+
+    from .embeddings import embed_texts
+
+    if mode == "per_item":
+        return embed_texts([d.text for d in docs], batch_size=batch_size, num_workers=num_workers)
+    if mode != "factorized":
+        raise ValueError(f"Unknown embedding mode {mode!r}; expected one of {EMBEDDING_MODES}.")
+
+    ## one encode pass over the union of unique components (embed_texts dedups exact repeats) ...
+    parts = list(FACTOR_WEIGHTS)
+    texts = [getattr(d, p) or d.text for p in parts for d in docs]
+    unique = list(dict.fromkeys(texts))
+    vecs = np.asarray(embed_texts(unique, batch_size=batch_size, num_workers=num_workers), dtype=np.float32)
+    row = {t: i for i, t in enumerate(unique)}
+
+    out = np.zeros((len(docs), vecs.shape[1] if len(vecs) else 0), dtype=np.float32)
+    for k, p in enumerate(parts):
+        idx = np.fromiter((row[t] for t in texts[k * len(docs):(k + 1) * len(docs)]), dtype=np.int64, count=len(docs))
+        out += FACTOR_WEIGHTS[p] * vecs[idx]
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (out / norms).tolist()
+
+def artifact_path(persist_dir: str, collection_name: str, name: str) -> Path:
+    ## side indexes built next to the vector store (lexical postings, ...) live per collection ...
+    return Path(persist_dir) / "artifacts" / collection_name / name
+
+LEXICAL_INDEX_FILE = "lexical.json"
+SCORE_STATS_FILE = "score_stats.json"
+ATTRIBUTE_INDEX_FILE = "attributes.npz"
+CATALOG_FILE = "catalog.npz"
+
+@lru_cache(maxsize=4)
+def _http_client(url: str, pool_size: int) -> chromadb.ClientAPI:
+    import chromadb
+    from urllib.parse import urlparse
+    from chromadb.config import Settings as ChromaSettings
+
+    ## one client per process: its keep-alive connection pool is shared by all threads / sessions ...
+    u = urlparse(url if "://" in url else f"http://{url}")
+    ssl = u.scheme == "https"
+    return chromadb.HttpClient(
+        host=u.hostname or "localhost",
+        port=u.port or (443 if ssl else 8000),
+        ssl=ssl,
+        settings=ChromaSettings(
+            anonymized_telemetry=False,
+            chroma_http_max_connections=pool_size,
+            chroma_http_max_keepalive_connections=pool_size,
+        ),
+    )
+
+def get_chroma_client(persist_dir: str, settings: Optional[Settings] = None) -> chromadb.ClientAPI:
+    ## `settings.chroma_server_url` set -> every process talks to one shared index server
+    ## instead of opening `persist_dir` itself ...
+    if settings is None:
+        from .config import get_settings
+
+        settings = get_settings(require_api_key=False)
+    if settings.chroma_server_url:
+        return _http_client(settings.chroma_server_url, settings.chroma_pool_size)
+
+    import chromadb
+    from chromadb.config import Settings as ChromaSettings
+
     return chromadb.PersistentClient(
         path=persist_dir,
         settings=ChromaSettings(anonymized_telemetry=False),
     )
 
+def hnsw_metadata(
+    *,
+    m: Optional[int] = None,
+    construction_ef: Optional[int] = None,
+    search_ef: Optional[int] = None,
+    num_threads: Optional[int] = None,
+) -> dict[str, Any]:
+    ## collection metadata understood by Chroma's HNSW index ...
+    ## parameters left as None fall back to Chroma's defaults.
+    meta: dict[str, Any] = {"hnsw:space": "cosine"}
+    if m is not None:
+        meta["hnsw:M"] = int(m)
+    if construction_ef is not None:
+        meta["hnsw:construction_ef"] = int(construction_ef)
+    if search_ef is not None:
+        meta["hnsw:search_ef"] = int(search_ef)
+    if num_threads is not None:
+        meta["hnsw:num_threads"] = int(num_threads)
+    return meta
+
+def hnsw_metadata_from_settings(settings) -> dict[str, Any]:
+    return hnsw_metadata(
+        m=settings.hnsw_m,
+        construction_ef=settings.hnsw_construction_ef,
+        search_ef=settings.hnsw_search_ef,
+        num_threads=settings.hnsw_num_threads,
+    )
+
+def collection_names(client) -> list[str]:
+    ## chromadb < 0.6 returns Collection objects, newer versions return plain names ...
+    return [c if isinstance(c, str) else c.name for c in client.list_collections()]
+
+def _validate_collection(
+    col,
+    docs_list: list[IndexDoc],
+    embeddings: list[list[float]],
+    validation_queries: Optional[list[str]],
+    sample_size: int = 8,
+) -> None:
+    from .index_registry import IndexNotReadyError
+
+    ## 1) every document made it in ...
+    count = col.count()
+    if count != len(docs_list):
+        raise IndexNotReadyError(f"Validation failed: collection has {count} docs, expected {len(docs_list)}.")
+    if not docs_list:
+        raise IndexNotReadyError("Validation failed: refusing to publish an empty index.")
+
+    ## 2) sampled documents find themselves (or an identical twin) among their nearest neighbours ...
+    step = max(1, len(docs_list) // sample_size)
+    positions = list(range(0, len(docs_list), step))[:sample_size]
+    res = col.query(
+        query_embeddings=[[float(x) for x in embeddings[p]] for p in positions],
+        n_results=min(5, len(docs_list)),
+        include=["distances"],
+    )
+    found = 0
+    for p, ids, dists in zip(positions, res.get("ids") or [], res.get("distances") or []):
+        if docs_list[p].doc_id in ids or (len(dists) and float(dists[0]) < 1e-4):
+            found += 1
+    if found < max(1, int(0.8 * len(positions))):
+        raise IndexNotReadyError(f"Validation failed: only {found}/{len(positions)} sampled docs retrievable.")
+
+    ## 3) sample queries return something ...
+    if validation_queries:
+        from .embeddings import embed_texts
+
+        res = col.query(query_embeddings=embed_texts(list(validation_queries)), n_results=1, include=[])
+        empty = [q for q, ids in zip(validation_queries, res.get("ids") or []) if not ids]
+        if empty:
+            raise IndexNotReadyError(f"Validation failed: no results for sample queries {empty}.")
+
+def _drop_collection(client, persist_dir: str, name: str) -> None:
+    import shutil
+
+    try:
+        client.delete_collection(name)
+    except Exception:
+        pass
+    shutil.rmtree(Path(persist_dir) / "artifacts" / name, ignore_errors=True)
+
+def garbage_collect_versions(client, persist_dir: str, collection_name: str, keep_versions: int = 2) -> list[str]:
+    """Delete physical versions of `collection_name` that are neither live nor kept for rollback."""
+    from .index_registry import VERSION_SEPARATOR, retained_collections
+
+    keep = set(retained_collections(persist_dir, collection_name, keep_versions))
+    removed = []
+    for name in collection_names(client):
+        ## the bare alias name is a pre-alias (in-place) build, it is an old version too ...
+        is_version = name.startswith(f"{collection_name}{VERSION_SEPARATOR}") or name == collection_name
+        if is_version and name not in keep:
+            _drop_collection(client, persist_dir, name)
+            removed.append(name)
+    return removed
+
 def rebuild_collection(
     *,
     persist_dir: str,
     collection_name: str,
     docs: Iterable[IndexDoc],
     batch_size: int = 256,
+    hnsw: Optional[dict[str, Any]] = None,
+    embeddings: Optional[list[list[float]]] = None,
+    embed_batch_size: int = DEFAULT_EMBED_BATCH_SIZE,
+    embed_workers: int = 1,
+    embedding_mode: str = "per_item",
+    validation_queries: Optional[list[str]] = None,
+    keep_versions: int = 2,
+    artifacts: Optional[dict[str, bytes]] = None,
+    before_publish: Optional[Callable[[str], None]] = None,
 ) -> int:
+    """Blue/green build: write a new versioned collection, validate it, then flip the alias.
+
+    `collection_name` is the alias the retriever reads; the live collection is never touched
+    while the new one is built, so queries keep being served from the previous version.
+    `artifacts` (file name -> bytes, e.g. from an imported index artifact) are written verbatim
+    instead of rebuilding the side indexes from `docs`. `before_publish` is called with the
+    physical collection name once it validated (e.g. cache warm-up); raising aborts the build.
+    """
+    from .index_registry import new_index_version, publish_index_version, versioned_collection_name
+
     client = get_chroma_client(persist_dir)
 
-    existing = [c.name for c in client.list_collections()]
-    if collection_name in existing:
-        client.delete_collection(collection_name)
-
-    col = client.get_or_create_collection(name=collection_name, metadata={"hnsw:space": "cosine"})
-
-    docs_list = list(docs)
-    texts = [d.text for d in docs_list]
-    embeddings = embed_texts(texts)
-
-    total = 0
-    for i in range(0, len(docs_list), batch_size):
-        batch_docs = docs_list[i:i+batch_size]
-        batch_emb = embeddings[i:i+batch_size]
-        col.add(
-            ids=[d.doc_id for d in batch_docs],
-            documents=[d.text for d in batch_docs],
-            metadatas=[d.metadata for d in batch_docs],
-            embeddings=batch_emb,
-        )
-        total += len(batch_docs)
+    version = new_index_version()
+    physical = versioned_collection_name(collection_name, version)
+    col = client.create_collection(name=physical, metadata=hnsw or hnsw_metadata())
+
+    try:
+        docs_list = list(docs)
+        if embeddings is None:
+            embeddings = embed_docs(
+                docs_list, mode=embedding_mode, batch_size=embed_batch_size, num_workers=embed_workers
+            )
+        if len(embeddings) != len(docs_list):
+            raise ValueError(f"Got {len(embeddings)} embeddings for {len(docs_list)} docs.")
+
+        total = 0
+        for i in range(0, len(docs_list), batch_size):
+            batch_docs = docs_list[i:i+batch_size]
+            batch_emb = embeddings[i:i+batch_size]
+            if hasattr(batch_emb, "tolist"):
+                ## numpy / memory-mapped matrices (imported artifacts) ...
+                batch_emb = batch_emb.tolist()
+            col.add(
+                ids=[d.doc_id for d in batch_docs],
+                documents=[d.text for d in batch_docs],
+                metadatas=[d.metadata for d in batch_docs],
+                embeddings=batch_emb,
+            )
+            total += len(batch_docs)
+
+        if artifacts is not None:
+            for name, blob in artifacts.items():
+                target = artifact_path(persist_dir, physical, name)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(blob)
+        else:
+            ## token inverted index over names / cuisine / category for exact lookups ...
+            from .lexical import LexicalIndex
+
+            LexicalIndex.build(docs_list).save(artifact_path(persist_dir, physical, LEXICAL_INDEX_FILE))
+
+            ## per-value bitsets + sorted numeric arrays for structured pre-filtering ...
+            from .attribute_index import AttributeIndex
+
+            AttributeIndex.build(docs_list).save(artifact_path(persist_dir, physical, ATTRIBUTE_INDEX_FILE))
+
+            ## compact column store of the metadata, the re-ranker reads candidates from it ...
+            from .catalog import CatalogStore
+
+            CatalogStore.from_metadatas(d.metadata for d in docs_list).save(
+                artifact_path(persist_dir, physical, CATALOG_FILE)
+            )
+
+            ## global / per-location ranges for stable score normalization ...
+            from .score_stats import ScoreStats
+
+            ScoreStats.from_metadatas(d.metadata for d in docs_list).save(
+                artifact_path(persist_dir, physical, SCORE_STATS_FILE)
+            )
+
+        # ChromaDB >=0.5 persists automatically; older clients expose persist().
+        persist_fn = getattr(client, "persist", None)
+        if callable(persist_fn):
+            persist_fn()
+
+        _validate_collection(col, docs_list, embeddings, validation_queries)
+        if before_publish is not None:
+            before_publish(physical)
+    except BaseException:
+        ## never leave a half-built version behind; the alias still points at the old one ...
+        _drop_collection(client, persist_dir, physical)
+        raise
 
-    # ChromaDB >=0.5 persists automatically; older clients expose persist().
-    persist_fn = getattr(client, "persist", None)
-    if callable(persist_fn):
-        persist_fn()
+    ## atomic alias flip: new version -> every retrieval cache keyed on the old one is stale ...
+    publish_index_version(persist_dir, collection_name, version=version, physical_name=physical)
+    garbage_collect_versions(client, persist_dir, collection_name, keep_versions=keep_versions)
     return total
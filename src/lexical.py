@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+## fields that go into the inverted index and how much a hit in each one is worth ...
+FIELD_WEIGHTS = {
+    "item_name": 3.0,
+    "restaurant_name": 2.0,
+    "cuisine_type": 1.0,
+    "category": 1.0,
+}
+
+## words that carry no lexical meaning or are handled by the structured filters instead ...
+_STOPWORDS = {
+    "a", "an", "and", "any", "at", "can", "dish", "for", "from", "get", "give", "i", "im", "in", "is",
+    "it", "like", "me", "my", "near", "of", "on", "or", "order", "please", "some", "something", "the",
+    "to", "want", "with", "would", "food", "item", "items",
+}
+_FILTER_WORDS = {
+    "veg", "vegetarian", "non", "nonveg", "spicy", "mild", "medium", "hot", "under", "below", "less",
+    "than", "within", "max", "budget", "cheap", "rs", "inr", "rupees", "min", "mins", "minute", "minutes",
+    "fast", "quick", "delivery", "deliver", "delivered",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(str(text or "").lower())
+
+@dataclass
+class LexicalMatch:
+    ## positions (into the index's doc list) and their lexical score ...
+    scores: dict[int, float]
+    ## True when every meaningful query token is explained by a dish/restaurant name,
+    ## i.e. the query is an exact lookup and can skip the vector search ...
+    exact: bool = False
+    exact_docs: list[int] = field(default_factory=list)
+
+@dataclass
+class LexicalIndex:
+    doc_ids: list[str]
+    ## token -> field -> sorted doc positions
+    postings: dict[str, dict[str, list[int]]]
+    ## "phrase tokens joined by space" -> doc positions, per field
+    phrases: dict[str, dict[str, list[int]]]
+    ## tokens that only narrow the query through filters (locations) ...
+    neutral: set[str] = field(default_factory=set)
+
+    @classmethod
+    def build(cls, docs: Iterable) -> "LexicalIndex":
+        doc_ids: list[str] = []
+        postings: dict[str, dict[str, set[int]]] = defaultdict(lambda: defaultdict(set))
+        phrases: dict[str, dict[str, set[int]]] = defaultdict(lambda: defaultdict(set))
+        neutral: set[str] = set()
+
+        for pos, d in enumerate(docs):
+            doc_ids.append(d.doc_id)
+            m = d.metadata
+            for f in FIELD_WEIGHTS:
+                toks = tokenize(m.get(f, ""))
+                if not toks:
+                    continue
+                for t in toks:
+                    postings[t][f].add(pos)
+                phrases[f][" ".join(toks)].add(pos)
+            neutral.update(tokenize(m.get("location", "")))
+
+        return cls(
+            doc_ids=doc_ids,
+            postings={t: {f: sorted(p) for f, p in fs.items()} for t, fs in postings.items()},
+            phrases={f: {ph: sorted(p) for ph, p in ps.items()} for f, ps in phrases.items()},
+            neutral=neutral - set(postings),
+        )
+
+    def save(self, path: str | Path) -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "doc_ids": self.doc_ids,
+            "postings": self.postings,
+            "phrases": self.phrases,
+            "neutral": sorted(self.neutral),
+        }
+        tmp = p.with_suffix(p.suffix + ".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(p)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "LexicalIndex":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(
+            doc_ids=data["doc_ids"],
+            postings=data["postings"],
+            phrases=data["phrases"],
+            neutral=set(data.get("neutral") or []),
+        )
+
+    def __post_init__(self) -> None:
+        self._df = {t: len({p for ps in fs.values() for p in ps}) for t, fs in self.postings.items()}
+
+    def _idf(self, token: str) -> float:
+        return math.log(1.0 + len(self.doc_ids) / (1.0 + self._df.get(token, 0)))
+
+    def _match_phrases(self, toks: list[str], field_name: str) -> tuple[list[set[int]], set[int]]:
+        ## greedy longest phrase match at every query position ...
+        table = self.phrases.get(field_name, {})
+        if not table:
+            return [], set()
+        longest = max(len(ph.split(" ")) for ph in table)
+        matched: list[set[int]] = []
+        covered: set[int] = set()
+        i = 0
+        while i < len(toks):
+            hit = None
+            for n in range(min(longest, len(toks) - i), 0, -1):
+                ph = " ".join(toks[i:i+n])
+                if ph in table:
+                    hit = (n, table[ph])
+                    break
+            if hit is None:
+                i += 1
+                continue
+            n, positions = hit
+            matched.append(set(positions))
+            covered.update(range(i, i + n))
+            i += n
+        return matched, covered
+
+    def search(self, query: str, limit: int = 50) -> LexicalMatch:
+        toks = tokenize(query)
+        content = [i for i, t in enumerate(toks) if t not in _STOPWORDS]
+        if not content:
+            return LexicalMatch(scores={})
+
+        ## scored candidates: sum of idf * field weight over query tokens ...
+        scores: dict[int, float] = defaultdict(float)
+        for i in content:
+            t = toks[i]
+            fields = self.postings.get(t)
+            if not fields:
+                continue
+            idf = self._idf(t)
+            for f, positions in fields.items():
+                w = FIELD_WEIGHTS.get(f, 1.0) * idf
+                for p in positions:
+                    scores[p] += w
+        top = dict(sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:limit])
+
+        ## exact lookup: dish and/or restaurant names spelled out, nothing else meaningful left over ...
+        covered: set[int] = set()
+        sets: list[set[int]] = []
+        anchored = False
+        for f in ["restaurant_name", "item_name", "cuisine_type", "category"]:
+            remaining = [t if i not in covered else "\0" for i, t in enumerate(toks)]
+            matched, cov = self._match_phrases(remaining, f)
+            if matched and f in ("restaurant_name", "item_name"):
+                anchored = True
+            ## the same name can repeat in a query ("dosa ... dosa"), union within a field ...
+            if matched:
+                sets.append(set().union(*matched))
+            covered |= cov
+
+        leftover = [
+            toks[i] for i in content
+            if i not in covered and toks[i] not in _FILTER_WORDS and toks[i] not in self.neutral
+            and not toks[i].isdigit()
+        ]
+        if not anchored or leftover:
+            return LexicalMatch(scores=top)
+
+        exact = set.intersection(*sets) if sets else set()
+        if not exact:
+            return LexicalMatch(scores=top)
+        exact_docs = sorted(exact, key=lambda p: -scores.get(p, 0.0))
+        return LexicalMatch(scores=top, exact=True, exact_docs=exact_docs)
+
+@lru_cache(maxsize=8)
+def _load_cached(path: str, mtime_ns: int) -> LexicalIndex:
+    return LexicalIndex.load(path)
+
+def load_lexical_index(path: str | Path) -> LexicalIndex | None:
+    ## cached per file version, so a rebuilt index is picked up without a restart ...
+    p = Path(path)
+    try:
+        mtime_ns = p.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _load_cached(str(p), mtime_ns)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+## HTTP status codes worth another attempt; other 4xx (bad request, auth) fail immediately ...
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+class LLMUnavailableError(RuntimeError):
+    """The LLM did not answer within the deadline (slow, failing or saturated)."""
+
+def make_gemini_client(settings) -> Any:
+    ## google.genai is imported lazily; GEMINI_BASE_URL points the SDK at e.g. scripts/fake_llm_server.py ...
+    from google import genai
+    from google.genai import types
+
+    http_options = types.HttpOptions(base_url=settings.gemini_base_url) if settings.gemini_base_url else None
+    return genai.Client(api_key=settings.google_api_key, http_options=http_options)
+
+def _is_retryable(exc: BaseException) -> bool:
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return not isinstance(code, int) or code in _RETRYABLE_STATUS
+
+class ResilientLLM:
+    """Deadline / concurrency / retry / hedging wrapper around a `genai.Client`-like object.
+
+    Exposes the same `client.models.generate_content(model=..., contents=...)` surface, so it can
+    be passed wherever a Gemini client is expected. Each call gets a total deadline covering all
+    attempts; at most `max_concurrency` attempts are in flight (abandoned slow attempts keep their
+    slot until they return, so a hanging backend sheds load instead of piling up threads). When
+    `hedge_after_s` is set and the first attempt is still running by then, one duplicate request
+    is sent and whichever finishes first wins.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        timeout_s: float = 8.0,
+        max_concurrency: int = 8,
+        max_retries: int = 2,
+        backoff_base_s: float = 0.2,
+        backoff_max_s: float = 2.0,
+        hedge_after_s: Optional[float] = None,
+    ) -> None:
+        self.client = client
+        self.timeout_s = float(timeout_s)
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base_s = float(backoff_base_s)
+        self.backoff_max_s = float(backoff_max_s)
+        self.hedge_after_s = hedge_after_s
+        self._slots = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(max_concurrency)), thread_name_prefix="llm")
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                       "timeouts": 0, "failures": 0, "shed": 0}
+
+    @classmethod
+    def from_settings(cls, client: Any, settings) -> "ResilientLLM":
+        return cls(
+            client,
+            timeout_s=settings.llm_timeout_s,
+            max_concurrency=settings.llm_max_concurrency,
+            max_retries=settings.llm_max_retries,
+            hedge_after_s=settings.llm_hedge_after_s,
+        )
+
+    @property
+    def models(self) -> "ResilientLLM":
+        return self
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[key] += n
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _submit(self, deadline: float, *, block: bool, **kwargs: Any) -> Optional[Future]:
+        ## a slot per in-flight attempt, released when the attempt returns (not when we stop waiting) ...
+        timeout = max(0.0, deadline - time.monotonic()) if block else 0.0
+        if not self._slots.acquire(timeout=timeout):
+            return None
+        try:
+            fut = self._pool.submit(self.client.models.generate_content, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        fut.add_done_callback(lambda _: self._slots.release())
+        self._count("attempts")
+        return fut
+
+    def _attempt(self, deadline: float, **kwargs: Any) -> Any:
+        first = self._submit(deadline, block=True, **kwargs)
+        if first is None:
+            self._count("shed")
+            raise LLMUnavailableError("LLM concurrency limit reached before the deadline.")
+        pending = {first}
+
+        if self.hedge_after_s is not None:
+            done, pending = wait(pending, timeout=min(self.hedge_after_s, max(0.0, deadline - time.monotonic())))
+            if not done:
+                ## tail latency: race one duplicate, but never queue for a slot to do it ...
+                hedge = self._submit(deadline, block=False, **kwargs)
+                if hedge is not None:
+                    self._count("hedges")
+                    pending.add(hedge)
+            else:
+                pending = done
+
+        errors: list[BaseException] = []
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for fut in done:
+                if fut.exception() is None:
+                    if fut is not first:
+                        self._count("hedge_wins")
+                    return fut.result()
+                errors.append(fut.exception())
+        if errors:
+            raise errors[0]
+        self._count("timeouts")
+        raise TimeoutError("LLM call exceeded its deadline.")
+
+    def generate_content(self, *, model: str, contents: Any, timeout_s: Optional[float] = None, **kwargs: Any) -> Any:
+        self._count("calls")
+        deadline = time.monotonic() + (self.timeout_s if timeout_s is None else float(timeout_s))
+        last: Optional[BaseException] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                ## full jitter: spread retries of concurrent callers instead of synchronizing them ...
+                delay = random.uniform(0.0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt))
+                if time.monotonic() + delay >= deadline:
+                    break
+                self._count("retries")
+                time.sleep(delay)
+            try:
+                return self._attempt(deadline, model=model, contents=contents, **kwargs)
+            except LLMUnavailableError:
+                raise
+            except TimeoutError as e:
+                ## the whole budget is spent, another attempt cannot finish in time ...
+                last = e
+                break
+            except Exception as e:
+                last = e
+                if not _is_retryable(e):
+                    break
+                logger.warning("LLM attempt %d failed: %s", attempt + 1, e)
+        self._count("failures")
+        raise LLMUnavailableError(f"LLM call failed: {last}") from last
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,15 +1,49 @@
 from __future__ import annotations
 
 import json
+import logging
+import os
 import re
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any, Optional
 
-from google import genai
+from .cache import LRUCache, normalize_query
+
+## google.genai is only needed for type hints here; callers construct the client ...
+if TYPE_CHECKING:
+    from google import genai
+
+    from .semantic_cache import SemanticQueryCache
+
+logger = logging.getLogger(__name__)
+
+## exact (normalized) query -> extracted filters; filled by real traffic and by the warm-up job ...
+_PARSE_CACHE = LRUCache(max_entries=int(os.getenv("PARSE_CACHE_SIZE", "1024") or 0))
+
+def parse_cache_stats() -> dict[str, Any]:
+    return _PARSE_CACHE.stats()
+
+def clear_parse_cache() -> None:
+    _PARSE_CACHE.clear()
 
 @dataclass
 class ParsedQuery:
     filters: dict[str, Any]
+    ## True when the LLM was slow / failing / returned garbage and retrieval runs unfiltered
+    degraded: bool = False
+
+def _extract_json(text: str) -> dict[str, Any]:
+    ## models sometimes wrap the object in ```json fences or add a sentence around it ...
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        m = re.search(r"\{.*\}", text, flags=re.DOTALL)
+        if not m:
+            raise ValueError(f"LLM returned no JSON object: {text[:200]!r}")
+        try:
+            return json.loads(m.group(0))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"LLM returned invalid JSON: {e}") from e
 
 _SPICE = {"mild", "medium", "spicy"}
 
@@ -63,8 +97,10 @@ Return JSON only. No markdown. No explanation.
     resp = client.models.generate_content(model=model, contents=prompt)
     text = (resp.text or "").strip()
 
-    data = json.loads(text)
-    filters = data.get("filters") or {}
+    data = _extract_json(text)
+    filters = data.get("filters") if isinstance(data, dict) else None
+    if not isinstance(filters, dict):
+        raise ValueError("LLM JSON has no 'filters' object.")
 
     if filters.get("spice_level") not in {"mild", "medium", "spicy"}:
         filters["spice_level"] = None
@@ -86,8 +122,28 @@ def parse_query(
     known_restaurants: list[str],
     known_locations: list[str],
     known_cuisines: list[str],
+    semantic_cache: Optional[SemanticQueryCache] = None,
+    query_embedding: Optional[list[float]] = None,
 ) -> ParsedQuery:
-    return rewrite_and_extract_with_gemini(
+    cache_key = (model, normalize_query(query))
+    cached = _PARSE_CACHE.get(cache_key)
+    if cached is not None:
+        return ParsedQuery(filters=dict(cached))
+
+    ## paraphrase of a recently parsed query -> reuse its filters, no Gemini call ...
+    namespace = None
+    if semantic_cache is not None and query_embedding is not None:
+        from .lexical import tokenize
+        from .semantic_cache import query_guard
+
+        vocab = {t for name in [*known_restaurants, *known_locations, *known_cuisines] for t in tokenize(name)}
+        namespace = ("filters", query_guard(query, vocab))
+        hit = semantic_cache.lookup(query_embedding, namespace)
+        if hit is not None:
+            return ParsedQuery(filters=dict(hit.payload))
+
+    try:
+        parsed = rewrite_and_extract_with_gemini(
             client=client,
             model=model,
             query=query,
@@ -95,3 +151,11 @@ def parse_query(
             known_locations=known_locations,
             known_cuisines=known_cuisines,
         )
+    except Exception as e:
+        ## slow / failing LLM or unparseable answer: fall back to unfiltered semantic retrieval ...
+        logger.warning("query parsing degraded to unfiltered retrieval: %s", e)
+        return ParsedQuery(filters={}, degraded=True)
+    _PARSE_CACHE.put(cache_key, dict(parsed.filters))
+    if namespace is not None:
+        semantic_cache.store(query_embedding, namespace, dict(parsed.filters), query=query)
+    return parsed
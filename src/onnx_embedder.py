@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+## files written by `scripts/export_onnx.py` ...
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+class OnnxEmbedder:
+    """Mean-pooled sentence embeddings from an exported ONNX encoder.
+
+    Mirrors the subset of `SentenceTransformer.encode` used by `embed_texts`, so it can be
+    swapped in without touching callers. Only needs onnxruntime + tokenizers (no torch).
+    """
+
+    def __init__(
+        self,
+        model_dir: str | Path,
+        *,
+        quantized: bool = False,
+        max_seq_length: int = 256,
+        num_threads: Optional[int] = None,
+    ) -> None:
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        d = Path(model_dir)
+        model_path = d / (ONNX_INT8_FILE if quantized else ONNX_FP32_FILE)
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"Missing {model_path}. Run `python scripts/export_onnx.py` first."
+            )
+
+        self.tokenizer = Tokenizer.from_file(str(d / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            opts.intra_op_num_threads = int(num_threads)
+        self.session = ort.InferenceSession(str(model_path), sess_options=opts, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _forward(self, texts: list[str]) -> np.ndarray:
+        enc = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in enc], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in enc], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_emb = self.session.run(None, feeds)[0]
+
+        ## same pooling as the sentence-transformers model: mean over non-padding tokens ...
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_emb * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        return (summed / counts).astype(np.float32)
+
+    def encode(
+        self,
+        texts: list[str],
+        *,
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = False,
+    ) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        chunks = [self._forward(texts[i:i+batch_size]) for i in range(0, len(texts), batch_size)]
+        emb = np.vstack(chunks)
+        if normalize_embeddings:
+            norms = np.linalg.norm(emb, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            emb = emb / norms
+        return emb
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+## "exact": score every allowed doc by brute force, "ann": HNSW search (optionally restricted) ...
+EXACT = "exact"
+ANN = "ann"
+
+## the exact plan fetches the allowed embeddings from Chroma on every request (~30 µs per doc on
+## SQLite), the ANN plans only the hits, so exact only pays off for a few hundred docs ...
+BRUTE_FORCE_MAX = 256
+
+## above this selectivity an `$in` restriction costs more than post-filtering a few extra candidates ...
+_RESTRICT_MAX_SELECTIVITY = 0.5
+
+@dataclass(frozen=True)
+class QueryPlan:
+    strategy: str
+    allowed: int
+    total: int
+    candidate_k: int
+    ## push the allowed ids into the ANN query instead of filtering afterwards
+    restrict: bool
+    reason: str
+
+    @property
+    def label(self) -> str:
+        if self.strategy == EXACT:
+            return "exact"
+        return "restricted ANN" if self.restrict else "post-filtered ANN"
+
+    @property
+    def selectivity(self) -> float:
+        return self.allowed / self.total if self.total else 1.0
+
+def plan_query(
+    *,
+    allowed: Optional[int],
+    total: Optional[int],
+    top_k: int,
+    candidate_k: int,
+    brute_force_max: int = BRUTE_FORCE_MAX,
+    safety: float = 2.0,
+) -> QueryPlan:
+    """Pick brute force over the filtered subset or an ANN search with a tuned candidate_k.
+
+    `allowed` / `total` come from the attribute index (exact counts for the hard filters);
+    without it we cannot estimate selectivity and fall back to the caller's candidate_k.
+    """
+    if allowed is None or not total:
+        plan = QueryPlan(ANN, allowed or 0, total or 0, candidate_k, False, "no attribute index, default ANN")
+    elif allowed <= brute_force_max:
+        ## few enough docs that fetching and scoring all of them beats an HNSW walk, and it is exact ...
+        plan = QueryPlan(EXACT, allowed, total, allowed, False,
+                         f"{allowed} docs pass the filters (<= {brute_force_max}), exact scan")
+    else:
+        selectivity = allowed / total
+        if selectivity <= _RESTRICT_MAX_SELECTIVITY:
+            ## every restricted candidate passes the hard filters, but the hybrid re-rank still needs
+            ## the caller's pool depth: never below candidate_k, never more than the allowed docs ...
+            k = min(allowed, max(candidate_k, int(math.ceil(safety * top_k))))
+            plan = QueryPlan(ANN, allowed, total, k, True,
+                             f"selectivity {selectivity:.1%}, restricted ANN with candidate_k={k}")
+        else:
+            ## loose filters: post-filter, fetching enough that ~top_k survive in expectation ...
+            k = max(candidate_k, int(math.ceil(safety * top_k / max(selectivity, 1e-6))))
+            plan = QueryPlan(ANN, allowed, total, k, False,
+                             f"selectivity {selectivity:.1%}, post-filtered ANN with candidate_k={k}")
+
+    logger.info("query plan: %s (%s)", plan.strategy, plan.reason, extra={"plan": plan})
+    return plan
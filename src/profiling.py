@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+## only one deterministic profiler can be active per interpreter (sys.setprofile / sys.monitoring),
+## concurrent sampled requests simply go unprofiled ...
+_ACTIVE = threading.Lock()
+
+## rate and output directory come from Settings (PROFILE_RATE / PROFILE_DIR, parsed there) ...
+def default_rate() -> float:
+    return get_settings(require_api_key=False).profile_rate
+
+def default_dir() -> str:
+    return get_settings(require_api_key=False).profile_dir
+
+@dataclass
+class RequestProfile:
+    name: str
+    sampled: bool = False
+    path: Optional[Path] = None
+    summary: str = ""
+    wall_s: float = 0.0
+
+def top_self_time(stats: pstats.Stats, limit: int = 20) -> str:
+    """Top functions by self time (time spent in the function body, excluding callees)."""
+    buf = io.StringIO()
+    stats.stream = buf
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(limit)
+    ## drop the per-run header pstats prints before the table ...
+    text = buf.getvalue()
+    start = text.find("   ncalls")
+    return text[start:] if start >= 0 else text
+
+@contextmanager
+def profile_request(
+    name: str,
+    *,
+    force: bool = False,
+    rate: Optional[float] = None,
+    out_dir: Optional[str] = None,
+    top: int = 20,
+) -> Iterator[RequestProfile]:
+    """Profile the enclosed request with cProfile for a `rate` fraction of calls (or when `force`d).
+
+    Writes `<out_dir>/<time>-<name>-<id>.prof` (load with `python -m pstats` / snakeviz) and a
+    `.txt` next to it with the top self-time functions. Work done on other threads (e.g. Gemini
+    calls inside `ResilientLLM`) shows up as time waiting on them.
+    """
+    prof = RequestProfile(name=name)
+    rate = default_rate() if rate is None else rate
+    if not (force or (rate > 0 and random.random() < rate)) or not _ACTIVE.acquire(blocking=False):
+        yield prof
+        return
+
+    profiler = cProfile.Profile()
+    t0 = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            yield prof
+        finally:
+            profiler.disable()
+            prof.wall_s = time.perf_counter() - t0
+            prof.sampled = True
+            try:
+                _write_profile(prof, profiler, Path(out_dir or default_dir()), top)
+            except OSError as e:
+                logger.warning("could not write request profile: %s", e)
+    finally:
+        _ACTIVE.release()
+
+def _write_profile(prof: RequestProfile, profiler: cProfile.Profile, out_dir: Path, top: int) -> None:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^a-z0-9_-]+", "-", prof.name.lower()).strip("-") or "request"
+    base = out_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{uuid.uuid4().hex[:6]}"
+
+    prof.path = base.with_suffix(".prof")
+    profiler.dump_stats(prof.path)
+    prof.summary = f"{prof.name}: {prof.wall_s * 1000:.1f} ms wall\n\n" + top_self_time(pstats.Stats(profiler), top)
+    base.with_suffix(".txt").write_text(prof.summary, encoding="utf-8")
+    logger.info("request profile written to %s (%.1f ms)", prof.path, prof.wall_s * 1000)
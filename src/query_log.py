@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Optional
+
+from .cache import canonical_filters, normalize_query
+
+## scrubbed before anything is written: e-mails, phone / card / order numbers, URLs ...
+_EMAIL_RE = re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b")
+_URL_RE = re.compile(r"\bhttps?://\S+")
+_LONG_NUMBER_RE = re.compile(r"\+?\d[\d\s-]{5,}\d")
+_MAX_QUERY_CHARS = 200
+
+def anonymize_query(text: str) -> str:
+    ## short numbers stay ("under 250", "in 30 mins"), they are what the parser needs ...
+    q = _EMAIL_RE.sub("<email>", str(text or ""))
+    q = _URL_RE.sub("<url>", q)
+    q = _LONG_NUMBER_RE.sub("<number>", q)
+    return normalize_query(q)[:_MAX_QUERY_CHARS]
+
+class QueryLog:
+    """Append-only JSONL log of anonymized queries (no user / session ids, day-level timestamps)."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        query: str,
+        *,
+        filters: Optional[dict[str, Any]] = None,
+        location: Optional[str] = None,
+        top_k: Optional[int] = None,
+    ) -> None:
+        q = anonymize_query(query)
+        if not q:
+            return
+        entry = {
+            "day": time.strftime("%Y-%m-%d"),
+            "query": q,
+            "location": location or None,
+            "top_k": top_k,
+            "filters": json.loads(canonical_filters(filters)),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(line)
+
+def top_queries(path: str | Path, n: int) -> list[dict[str, Any]]:
+    """The `n` most frequent (query, location, top_k) entries, most frequent first."""
+    p = Path(path)
+    if n <= 0 or not p.exists():
+        return []
+    counts: Counter = Counter()
+    latest: dict[tuple, dict] = {}
+    with open(p, encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                e = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            key = (e.get("query"), e.get("location"), e.get("top_k"))
+            if not key[0]:
+                continue
+            counts[key] += 1
+            latest[key] = e
+    return [{**latest[key], "count": c} for key, c in counts.most_common(n)]
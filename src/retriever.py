@@ -1,12 +1,32 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Optional
+import os
+import threading
+import numpy as np
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Any, Optional
 
-from .embeddings import embed_text
-from .indexer import get_chroma_client
+from .cache import LRUCache, canonical_filters, normalize_query
+from .diversity import diversified_top_k
+from .index_registry import IndexNotReadyError, read_index_version, resolve_collection
+from .attribute_index import load_attribute_index
+from .catalog import CatalogStore, load_catalog
+from .indexer import (
+    ATTRIBUTE_INDEX_FILE,
+    CATALOG_FILE,
+    LEXICAL_INDEX_FILE,
+    SCORE_STATS_FILE,
+    artifact_path,
+    get_chroma_client,
+)
+from .lexical import load_lexical_index
+from .planner import BRUTE_FORCE_MAX, EXACT, plan_query
+from .score_stats import W_DELIVERY, W_POPULARITY, W_RATING, W_SIM, ScoreStats, load_score_stats, normalize
 
-@dataclass
+if TYPE_CHECKING:
+    from .semantic_cache import SemanticQueryCache
+
+@dataclass(slots=True)
 class Recommendation:
     item_id: int
     restaurant_id: int
@@ -24,53 +44,88 @@ class Recommendation:
     final_score: float
     reason_tags: list[str]
 
-def _normalize(x: float, lo: float, hi: float) -> float:
-    if hi <= lo:
-        return 0.0
-    return float((x - lo) / (hi - lo))
+## end-to-end result cache, keyed on the published index version so a rebuild invalidates it ...
+_RESULT_CACHE = LRUCache(max_entries=int(os.getenv("RESULT_CACHE_SIZE", "2048") or 0))
 
-def retrieve(
-    *,
-    chroma_dir: str,
-    collection_name: str,
-    query_text: str,
+## open Collection handles per physical version; with an index server this saves a
+## round trip per request (a new version has a new physical name, so entries never go stale).
+## The client comes from the process settings (CHROMA_SERVER_URL / CHROMA_POOL_SIZE) ...
+_COLLECTIONS = LRUCache(max_entries=8)
+## Chroma's client start-up is not thread-safe (concurrent first requests fail inside the
+## Rust bindings / tenant lookup), so handles are created by one thread at a time ...
+_COLLECTIONS_LOCK = threading.Lock()
+
+def _open_collection(chroma_dir: str, physical: str):
+    key = (chroma_dir, physical)
+    col = _COLLECTIONS.get(key)
+    if col is not None:
+        return col
+    with _COLLECTIONS_LOCK:
+        col = _COLLECTIONS.get(key)
+        if col is None:
+            col = get_chroma_client(chroma_dir).get_collection(name=physical)
+            _COLLECTIONS.put(key, col)
+    return col
+
+def _is_missing_collection(exc: BaseException) -> bool:
+    ## chromadb >= 0.6 raises NotFoundError for an unknown collection, older releases a ValueError ...
+    from chromadb.errors import NotFoundError
+
+    return isinstance(exc, (NotFoundError, ValueError))
+
+def _live_collection(chroma_dir: str, collection_name: str):
+    ## resolve the alias to the live physical collection; never create an empty one here ...
+    physical = resolve_collection(chroma_dir, collection_name)
+    try:
+        return physical, _open_collection(chroma_dir, physical)
+    except Exception as e:
+        ## only a missing collection means "not built"; connection / client errors surface as they are ...
+        if not _is_missing_collection(e):
+            raise
+        raise IndexNotReadyError(
+            f"No index published for '{collection_name}' in {chroma_dir}. Run scripts/build_index.py."
+        ) from e
+
+def open_index(chroma_dir: str, collection_name: str) -> str:
+    """Open the live collection (client included) once, e.g. before fanning `retrieve` out to threads.
+
+    Returns the physical collection name; raises IndexNotReadyError if nothing is published.
+    """
+    return _live_collection(chroma_dir, collection_name)[0]
+
+def result_cache_stats() -> dict[str, Any]:
+    return _RESULT_CACHE.stats()
+
+def clear_result_cache() -> None:
+    _RESULT_CACHE.clear()
+
+def _score_candidates(
+    metas: list[dict],
+    sims: list[float],
     filters: dict[str, Any],
-    top_k: int = 5,
-    candidate_k: int = 20,
-    user_location: Optional[str] = None,
+    user_location: Optional[str],
+    base_tags: Optional[list[list[str]]] = None,
+    stats: Optional[ScoreStats] = None,
+    sort: bool = True,
 ) -> list[Recommendation]:
-    client = get_chroma_client(chroma_dir)
-    col = client.get_or_create_collection(name=collection_name)
-    
-    ## after parsing the query, we need to embed the query text to get the nearest neighbor ....
-    q_emb = embed_text(query_text)
-    
-    ## querying the vector db ....
-    ## for now top 20 candidates are returned ...
-    res = col.query(
-        query_embeddings=[q_emb],
-        n_results=candidate_k,
-        include=["metadatas", "distances"],
-    )
-    
-    ## now we have the semantic distances for neighbors
-    ## and their metadata for further ranking .....
-    metas = (res.get("metadatas") or [[]])[0]
-    dists = (res.get("distances") or [[]])[0]
     if not metas:
         return []
 
-    sims = [float(1.0 - d) for d in dists]  # cosine distance -> similarity
-    
+    ## normalization ranges: catalog-wide stats from index time when available (stable across queries),
+    ## otherwise the min/max of the candidates we got back ...
+    if stats is not None and len(stats.global_ranges) == 3:
+        (dmin, dmax) = stats.global_ranges["delivery_time_minutes"]
+        (rmin, rmax) = stats.global_ranges["average_rating"]
+        (pmin, pmax) = stats.global_ranges["popularity_score"]
+    else:
+        ## now from the filtered candidate metadata, we need to extract the delivery time, rating and popularity ...
+        delivery = [int(m.get("delivery_time_minutes", 999)) for m in metas]
+        rating = [float(m.get("average_rating", 0.0)) for m in metas]
+        popularity = [int(m.get("popularity_score", 0)) for m in metas]
 
-    ## now from the filtered candidate metadata, we need to extract the delivery time, rating and popularity ...
-    delivery = [int(m.get("delivery_time_minutes", 999)) for m in metas]
-    rating = [float(m.get("average_rating", 0.0)) for m in metas]
-    popularity = [int(m.get("popularity_score", 0)) for m in metas]
-
-    dmin, dmax = min(delivery), max(delivery)
-    rmin, rmax = min(rating), max(rating)
-    pmin, pmax = min(popularity), max(popularity)
+        dmin, dmax = min(delivery), max(delivery)
+        rmin, rmax = min(rating), max(rating)
+        pmin, pmax = min(popularity), max(popularity)
     
     ## filters are the constraints that the user has mentioned in the query ...
     max_price = filters.get("max_price")
@@ -84,9 +139,9 @@ def retrieve(
     ## preparing the output list of recommendations ...
     out: list[Recommendation] = []
 
-    for m, sim in zip(metas, sims):
+    for i, (m, sim) in enumerate(zip(metas, sims)):
         ## tags are the reason tags for the recommendation ...
-        tags: list[str] = []
+        tags: list[str] = list(base_tags[i]) if base_tags else []
 
         if rest_name and str(m.get("restaurant_name", "")).lower() != rest_name:
             continue
@@ -131,15 +186,15 @@ def retrieve(
         if max_dt is not None:
             tags.append("within_time")
 
-        dt_score = 1.0 - _normalize(dt, dmin, dmax)
-        rating_score = _normalize(float(m.get("average_rating", 0.0)), rmin, rmax)
-        pop_score = _normalize(float(m.get("popularity_score", 0)), pmin, pmax)
+        dt_score = 1.0 - normalize(dt, dmin, dmax)
+        rating_score = normalize(float(m.get("average_rating", 0.0)), rmin, rmax)
+        pop_score = normalize(float(m.get("popularity_score", 0)), pmin, pmax)
 
         final = (
-            0.70 * float(sim) +
-            0.15 * dt_score +
-            0.10 * rating_score +
-            0.05 * pop_score
+            W_SIM * float(sim) +
+            W_DELIVERY * dt_score +
+            W_RATING * rating_score +
+            W_POPULARITY * pop_score
         ) - budget_penalty
 
         out.append(
@@ -166,5 +221,285 @@ def retrieve(
     ## higher the final score, higher the recommendation ...
     ## final score is a hybrid score of semantic similarity, delivery time, rating and popularity ...
     ## and some sort of penalty scores for over budget and over time ...
-    out.sort(key=lambda r: r.final_score, reverse=True)
-    return out[:top_k]
+    ## (diversified selection picks from the unsorted list with a heap instead)
+    if sort:
+        out.sort(key=lambda r: r.final_score, reverse=True)
+    return out
+
+def _get_by_ids(col, ids: list[str], include: list[str]) -> tuple[list[str], list[dict], list]:
+    ## Chroma does not promise the requested order, keep whatever order it returns ...
+    if not ids:
+        return [], [], []
+    got = col.get(ids=ids, include=include)
+    embs = got.get("embeddings")
+    return list(got.get("ids") or []), list(got.get("metadatas") or []), [] if embs is None else list(embs)
+
+def _metas_for(col, catalog: Optional[CatalogStore], ids: list[str]) -> list:
+    ## record views over the shared column store; Chroma metadata only for indexes built without one ...
+    views = catalog.views_for_ids(ids) if catalog is not None else None
+    if views is not None:
+        return views
+    got_ids, metas, _ = _get_by_ids(col, ids, ["metadatas"])
+    by_id = dict(zip(got_ids, metas))
+    return [by_id.get(i) or {} for i in ids]
+
+def _copy_recs(recs: list[Recommendation]) -> list[Recommendation]:
+    ## callers may mutate what they get back, never hand out the cached objects ...
+    return [replace(r, reason_tags=list(r.reason_tags)) for r in recs]
+
+def retrieve(
+    *,
+    chroma_dir: str,
+    collection_name: str,
+    query_text: str,
+    filters: dict[str, Any],
+    top_k: int = 5,
+    candidate_k: int = 20,
+    user_location: Optional[str] = None,
+    use_lexical: bool = True,
+    use_cache: bool = True,
+    query_embedding: Optional[list[float]] = None,
+    semantic_cache: Optional[SemanticQueryCache] = None,
+    brute_force_max: int = BRUTE_FORCE_MAX,
+    max_per_restaurant: Optional[int] = None,
+    dedup_dishes: bool = False,
+) -> list[Recommendation]:
+    args = dict(
+        chroma_dir=chroma_dir,
+        collection_name=collection_name,
+        query_text=query_text,
+        filters=filters,
+        top_k=top_k,
+        candidate_k=candidate_k,
+        user_location=user_location,
+        use_lexical=use_lexical,
+        query_embedding=query_embedding,
+        semantic_cache=semantic_cache,
+        brute_force_max=brute_force_max,
+        max_per_restaurant=max_per_restaurant,
+        dedup_dishes=dedup_dishes,
+    )
+    if not use_cache:
+        return _retrieve_uncached(**args)
+
+    key = (
+        normalize_query(query_text),
+        canonical_filters(filters),
+        (user_location or "").strip().lower(),
+        int(top_k),
+        int(candidate_k),
+        bool(use_lexical),
+        max_per_restaurant,
+        bool(dedup_dishes),
+        chroma_dir,
+        collection_name,
+        read_index_version(chroma_dir, collection_name),
+    )
+    cached = _RESULT_CACHE.get(key)
+    if cached is not None:
+        return _copy_recs(cached)
+
+    recs = _retrieve_uncached(**args)
+    _RESULT_CACHE.put(key, _copy_recs(recs))
+    return recs
+
+def _dot(a, b) -> float:
+    return float(sum(x * y for x, y in zip(a, b)))
+
+def _retrieve_uncached(
+    *,
+    chroma_dir: str,
+    collection_name: str,
+    query_text: str,
+    filters: dict[str, Any],
+    top_k: int,
+    candidate_k: int,
+    user_location: Optional[str],
+    use_lexical: bool,
+    query_embedding: Optional[list[float]],
+    semantic_cache: Optional[SemanticQueryCache],
+    brute_force_max: int,
+    max_per_restaurant: Optional[int],
+    dedup_dishes: bool,
+) -> list[Recommendation]:
+    ## plain top-k on sorted candidates, or a heap-based pass with per-restaurant caps / dish dedup ...
+    diverse = max_per_restaurant is not None or dedup_dishes
+
+    def select(recs: list[Recommendation]) -> list[Recommendation]:
+        if not diverse:
+            return recs[:top_k]
+        return diversified_top_k(recs, top_k, max_per_restaurant=max_per_restaurant, dedup_dishes=dedup_dishes)
+
+    physical, col = _live_collection(chroma_dir, collection_name)
+    stats = load_score_stats(artifact_path(chroma_dir, physical, SCORE_STATS_FILE))
+    catalog = load_catalog(artifact_path(chroma_dir, physical, CATALOG_FILE))
+
+    ## hard filters -> allowed-doc bitmap, used to restrict the lexical and vector searches ...
+    allowed_mask = None
+    attrs = load_attribute_index(artifact_path(chroma_dir, physical, ATTRIBUTE_INDEX_FILE))
+    if attrs is not None:
+        bits = attrs.resolve(filters, user_location)
+        allowed_mask = np.unpackbits(bits, count=attrs.size).astype(bool)
+        if not allowed_mask.any():
+            return []
+
+    ## lexical postings first: exact dish / restaurant lookups never need the model ...
+    lexical = None
+    match = None
+    if use_lexical:
+        lexical = load_lexical_index(artifact_path(chroma_dir, physical, LEXICAL_INDEX_FILE))
+        match = lexical.search(query_text, limit=candidate_k) if lexical else None
+
+    if match is not None and match.exact:
+        exact_docs = match.exact_docs
+        if allowed_mask is not None and len(allowed_mask) == len(lexical.doc_ids):
+            exact_docs = [p for p in exact_docs if allowed_mask[p]]
+        exact_ids = [lexical.doc_ids[p] for p in exact_docs[: max(candidate_k * 5, 100)]]
+        metas = _metas_for(col, catalog, exact_ids)
+        out = _score_candidates(
+            metas,
+            [1.0] * len(metas),
+            filters,
+            user_location,
+            base_tags=[["exact_match"] for _ in metas],
+            stats=stats,
+            sort=not diverse,
+        )
+        if out:
+            return select(out)
+        ## every exact hit was filtered out, fall back to the semantic path ...
+
+    ## selectivity decides between brute force over the filtered subset and (restricted) ANN ...
+    plan = plan_query(
+        allowed=int(allowed_mask.sum()) if allowed_mask is not None else None,
+        total=attrs.size if attrs is not None else None,
+        top_k=top_k,
+        candidate_k=candidate_k,
+        brute_force_max=brute_force_max,
+    )
+    candidate_k = plan.candidate_k
+    where = None
+    if plan.restrict:
+        where = {"item_id": {"$in": attrs.item_ids[allowed_mask].tolist()}}
+
+    ## after parsing the query, we need to embed the query text to get the nearest neighbor ....
+    ## (imported here so the model / torch load is deferred to the first real query)
+    if query_embedding is not None:
+        q_emb = list(query_embedding)
+    else:
+        from .embeddings import embed_text
+
+        q_emb = embed_text(query_text)
+
+    lexical_ids = set()
+    if match is not None:
+        same_order = allowed_mask is not None and len(allowed_mask) == len(lexical.doc_ids)
+        lexical_ids = {lexical.doc_ids[p] for p in match.scores if not same_order or allowed_mask[p]}
+
+    lex_pool: Optional[tuple] = None
+
+    def fuse_lexical(ids: list, metas: list, embs: list, sims: list) -> None:
+        ## lexical candidates are fused in with their true cosine similarity (fetched once) ...
+        nonlocal lex_pool
+        if lex_pool is None:
+            lex_ids, _, lex_embs = _get_by_ids(col, sorted(lexical_ids), ["embeddings"])
+            lex_pool = (lex_ids, _metas_for(col, catalog, lex_ids), lex_embs, [_dot(q_emb, e) for e in lex_embs])
+        seen = set(ids)
+        for doc_id, m, e, sim in zip(*lex_pool):
+            if doc_id in seen:
+                continue
+            ids.append(doc_id)
+            metas.append(m)
+            embs.append(e)
+            sims.append(sim)
+
+    ## a paraphrase of a recent query reuses its candidate set (same index version) and skips the ANN search ...
+    namespace = None
+    hit = None
+    if semantic_cache is not None:
+        from .semantic_cache import query_guard
+
+        namespace = (
+            "candidates", chroma_dir, collection_name, read_index_version(chroma_dir, collection_name),
+            int(candidate_k), bool(use_lexical), query_guard(query_text),
+            canonical_filters(filters), (user_location or "").strip().lower(),
+            max_per_restaurant, bool(dedup_dishes),
+        )
+        hit = semantic_cache.lookup(q_emb, namespace)
+
+    ## the stored pool was sized (early termination) for the top_k it was searched with; a pool
+    ## for a smaller top_k, or one that comes up short here, is a miss and we search afresh ...
+    if hit is not None and hit.payload[3] >= top_k:
+        ids, metas, embs, _ = hit.payload
+        ids, metas, embs = list(ids), list(metas), list(embs)
+        sims = [_dot(q_emb, e) for e in embs]
+        fuse_lexical(ids, metas, embs, sims)
+        base_tags = [["lexical_match"] if doc_id in lexical_ids else [] for doc_id in ids]
+        out = _score_candidates(metas, sims, filters, user_location, base_tags=base_tags, stats=stats, sort=not diverse)
+        picked = select(out)
+        if len(picked) >= top_k:
+            return picked
+
+    if plan.strategy == EXACT:
+        ## exact scan: every allowed doc scored against the query, no HNSW walk and no recall loss ...
+        ids, _, embs = _get_by_ids(col, attrs.doc_ids[allowed_mask].tolist(), ["embeddings"])
+        metas = _metas_for(col, catalog, ids)
+        sims = (np.asarray(embs, dtype=np.float32) @ np.asarray(q_emb, dtype=np.float32)).tolist() if embs else []
+        base_tags = [["lexical_match"] if doc_id in lexical_ids else [] for doc_id in ids]
+        out = _score_candidates(metas, sims, filters, user_location, base_tags=base_tags, stats=stats, sort=not diverse)
+        return select(out)
+
+    ## early termination: ANN results arrive by decreasing similarity, so nothing we have not fetched
+    ## yet can score above W_SIM * (last similarity) + best possible non-semantic part. Start small and
+    ## only widen the search (up to candidate_k) while that bound could still beat the current top-k ...
+    effective_loc = user_location or filters.get("location")
+    bound = stats.non_semantic_upper_bound(effective_loc) if stats is not None else None
+    n = candidate_k if bound is None else min(candidate_k, max(2 * top_k, 10))
+    ## per-restaurant caps / dish dedup can leave the top-k short after candidate_k hits; then keep
+    ## doubling up to every doc the search can return (allowed docs when restricted) ...
+    max_n = plan.allowed if plan.restrict else (plan.total or col.count())
+    include = ["distances"] + (["metadatas"] if catalog is None else []) + (["embeddings"] if namespace is not None else [])
+
+    while True:
+        ## querying the vector db ....
+        res = col.query(
+            query_embeddings=[q_emb],
+            n_results=n,
+            where=where,
+            include=include,
+        )
+
+        ## now we have the semantic distances for neighbors
+        ## and their metadata for further ranking .....
+        ids = list((res.get("ids") or [[]])[0])
+        metas = list((res.get("metadatas") or [[]])[0]) if catalog is None else _metas_for(col, catalog, ids)
+        dists = (res.get("distances") or [[]])[0]
+        res_embs = res.get("embeddings")
+        embs = list(res_embs[0]) if res_embs is not None and len(res_embs) else []
+
+        sims = [float(1.0 - d) for d in dists]  # cosine distance -> similarity
+        ann_count = len(ids)
+        last_sim = min(sims) if sims else 0.0
+
+        fuse_lexical(ids, metas, embs, sims)
+
+        base_tags = [["lexical_match"] if doc_id in lexical_ids else [] for doc_id in ids]
+        out = _score_candidates(metas, sims, filters, user_location, base_tags=base_tags, stats=stats, sort=not diverse)
+        picked = select(out)
+
+        full = len(picked) >= top_k
+        if ann_count < n:
+            break
+        if n >= candidate_k:
+            if full or not diverse or n >= max_n:
+                break
+            n = min(max_n, n * 2)
+            continue
+        ## stop widening once the (diversified) top-k is full and nothing unseen can beat its last entry ...
+        if full and picked[-1].final_score >= W_SIM * last_sim + bound:
+            break
+        n = min(candidate_k, n * 2)
+
+    if namespace is not None:
+        semantic_cache.store(q_emb, namespace, (ids, metas, embs, top_k), query=query_text)
+    return picked
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Optional
+
+## re-ranking weights, shared by the scorer and the early-termination bound ...
+W_SIM = 0.70
+W_DELIVERY = 0.15
+W_RATING = 0.10
+W_POPULARITY = 0.05
+
+## metadata field -> value used when it is missing (same defaults as the re-ranker)
+STAT_FIELDS = {
+    "delivery_time_minutes": 999,
+    "average_rating": 0.0,
+    "popularity_score": 0,
+}
+
+Range = tuple[float, float]
+
+def _ranges(metas: Iterable[dict]) -> dict[str, Range]:
+    lo = {f: float("inf") for f in STAT_FIELDS}
+    hi = {f: float("-inf") for f in STAT_FIELDS}
+    for m in metas:
+        for f, default in STAT_FIELDS.items():
+            v = float(m.get(f, default))
+            lo[f] = min(lo[f], v)
+            hi[f] = max(hi[f], v)
+    return {f: (lo[f], hi[f]) for f in STAT_FIELDS if lo[f] <= hi[f]}
+
+def normalize(x: float, lo: float, hi: float) -> float:
+    if hi <= lo:
+        return 0.0
+    return float(min(1.0, max(0.0, (x - lo) / (hi - lo))))
+
+@dataclass
+class ScoreStats:
+    """Catalog-wide (and per-location) value ranges computed at index time.
+
+    The re-ranker normalizes against these instead of the min/max of whatever candidates came
+    back, so a given item gets the same non-semantic score regardless of the query.
+    """
+
+    global_ranges: dict[str, Range]
+    location_ranges: dict[str, dict[str, Range]] = field(default_factory=dict)
+    count: int = 0
+
+    @classmethod
+    def from_metadatas(cls, metas: Iterable[dict]) -> "ScoreStats":
+        metas = list(metas)
+        by_loc: dict[str, list[dict]] = {}
+        for m in metas:
+            by_loc.setdefault(str(m.get("location", "")).strip().lower(), []).append(m)
+        return cls(
+            global_ranges=_ranges(metas),
+            location_ranges={loc: _ranges(ms) for loc, ms in by_loc.items() if loc},
+            count=len(metas),
+        )
+
+    def non_semantic_upper_bound(self, location: Optional[str] = None) -> float:
+        ## best delivery/rating/popularity reachable by any item (in that location), scored on the
+        ## global scale; budget penalties only lower a score, so they can be ignored ...
+        g = self.global_ranges
+        local = self.location_ranges.get((location or "").strip().lower()) if location else None
+        r = local or g
+        bound = 0.0
+        if "delivery_time_minutes" in r and "delivery_time_minutes" in g:
+            bound += W_DELIVERY * (1.0 - normalize(r["delivery_time_minutes"][0], *g["delivery_time_minutes"]))
+        if "average_rating" in r and "average_rating" in g:
+            bound += W_RATING * normalize(r["average_rating"][1], *g["average_rating"])
+        if "popularity_score" in r and "popularity_score" in g:
+            bound += W_POPULARITY * normalize(r["popularity_score"][1], *g["popularity_score"])
+        return bound
+
+    def save(self, path: str | Path) -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(
+            json.dumps({
+                "global": self.global_ranges,
+                "locations": self.location_ranges,
+                "count": self.count,
+            }, indent=2),
+            encoding="utf-8",
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ScoreStats":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        as_range = lambda d: {f: (float(v[0]), float(v[1])) for f, v in d.items()}
+        return cls(
+            global_ranges=as_range(data.get("global") or {}),
+            location_ranges={loc: as_range(r) for loc, r in (data.get("locations") or {}).items()},
+            count=int(data.get("count") or 0),
+        )
+
+@lru_cache(maxsize=8)
+def _load_cached(path: str, mtime_ns: int) -> ScoreStats:
+    return ScoreStats.load(path)
+
+def load_score_stats(path: str | Path) -> Optional[ScoreStats]:
+    p = Path(path)
+    try:
+        mtime_ns = p.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _load_cached(str(p), mtime_ns)
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Hashable, Iterable, Optional
+
+import numpy as np
+
+from .lexical import tokenize
+
+## words that flip extracted filters; two queries only share a cache entry if these agree,
+## so "mild paneer" never reuses the filters of "spicy paneer" however close the embeddings are ...
+_GUARD_WORDS = {
+    "veg", "vegetarian", "vegan", "non", "nonveg", "chicken", "mutton", "fish", "egg",
+    "mild", "medium", "spicy", "hot", "not", "no", "without",
+    "cheap", "budget", "expensive", "premium", "fast", "quick",
+}
+
+## numbers are keyed together with what they bound, so "burger in 30 mins" (delivery time) and
+## "burger under 30" (price) never share an entry: "<30min" vs "<30" ...
+_UNITS = {
+    "min": "min", "mins": "min", "minute": "min", "minutes": "min",
+    "hr": "hr", "hrs": "hr", "hour": "hr", "hours": "hr",
+    "rs": "rs", "inr": "rs", "rupee": "rs", "rupees": "rs",
+}
+_BOUNDS = {
+    "under": "<", "below": "<", "less": "<", "within": "<", "max": "<", "upto": "<", "in": "<",
+    "over": ">", "above": ">", "more": ">", "least": ">",
+}
+_NUM_RE = re.compile(r"^(\d+)([a-z]*)$")
+
+def _numeric_guards(toks: list[str]) -> set[str]:
+    out = set()
+    for i, t in enumerate(toks):
+        m = _NUM_RE.match(t)
+        if not m:
+            continue
+        unit = _UNITS.get(m.group(2)) or (_UNITS.get(toks[i + 1], "") if i + 1 < len(toks) else "")
+        bound = ""
+        ## look back past "rs" / "than": "under rs 250", "less than 30" ...
+        for prev in reversed(toks[max(0, i - 3):i]):
+            if prev in _UNITS and not unit:
+                unit = _UNITS[prev]
+            elif prev in _BOUNDS:
+                bound = _BOUNDS[prev]
+                break
+        out.add(f"{bound}{m.group(1)}{unit}")
+    return out
+
+def query_guard(text: str, vocabulary: Iterable[str] = ()) -> tuple[str, ...]:
+    ## `vocabulary`: extra filter-bearing names (locations, cuisines, restaurants) ...
+    vocab = set(vocabulary)
+    toks = tokenize(text)
+    words = {t for t in toks if t in _GUARD_WORDS or t in vocab}
+    return tuple(sorted(words | _numeric_guards(toks)))
+
+@dataclass
+class SemanticHit:
+    similarity: float
+    query: str
+    payload: Any
+
+class _Store:
+    ## ring buffer of normalized query embeddings + their payloads ...
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.matrix: Optional[np.ndarray] = None
+        self.queries: list[str] = []
+        self.payloads: list[Any] = []
+        self.size = 0
+        self.next = 0
+
+    def add(self, emb: np.ndarray, query: str, payload: Any) -> None:
+        if self.matrix is None:
+            self.matrix = np.zeros((self.max_entries, emb.shape[0]), dtype=np.float32)
+            self.queries = [""] * self.max_entries
+            self.payloads = [None] * self.max_entries
+        i = self.next
+        self.matrix[i] = emb
+        self.queries[i] = query
+        self.payloads[i] = payload
+        self.next = (i + 1) % self.max_entries
+        self.size = min(self.size + 1, self.max_entries)
+
+    def best(self, emb: np.ndarray) -> tuple[int, float]:
+        if self.matrix is None or self.size == 0:
+            return -1, -1.0
+        ## entries are unit vectors, a dot product is the cosine similarity ...
+        sims = self.matrix[: self.size] @ emb
+        i = int(np.argmax(sims))
+        return i, float(sims[i])
+
+class SemanticQueryCache:
+    """Reuse work for paraphrased queries ("spicy paneer" ~ "paneer that's spicy").
+
+    Keeps recent query embeddings in a small in-memory matrix per namespace (parsed filters,
+    candidate sets for a given index version, ...) and returns the stored payload when a new
+    query's embedding is within `threshold` cosine similarity of a cached one.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 512) -> None:
+        self.threshold = float(threshold)
+        self.max_entries = max(1, int(max_entries))
+        self._stores: dict[Hashable, _Store] = {}
+        self._lock = threading.Lock()
+        self.hits: dict[Hashable, int] = {}
+        self.misses: dict[Hashable, int] = {}
+
+    @staticmethod
+    def _as_unit(embedding) -> np.ndarray:
+        v = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        n = float(np.linalg.norm(v))
+        return v / n if n > 0 else v
+
+    def lookup(self, embedding, namespace: Hashable) -> Optional[SemanticHit]:
+        v = self._as_unit(embedding)
+        with self._lock:
+            store = self._stores.get(namespace)
+            i, sim = store.best(v) if store is not None else (-1, -1.0)
+            if i < 0 or sim < self.threshold:
+                self.misses[namespace] = self.misses.get(namespace, 0) + 1
+                return None
+            self.hits[namespace] = self.hits.get(namespace, 0) + 1
+            return SemanticHit(similarity=sim, query=store.queries[i], payload=store.payloads[i])
+
+    def store(self, embedding, namespace: Hashable, payload: Any, query: str = "") -> None:
+        v = self._as_unit(embedding)
+        with self._lock:
+            store = self._stores.get(namespace)
+            if store is None:
+                store = self._stores[namespace] = _Store(self.max_entries)
+            store.add(v, query, payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stores.clear()
+
+    def stats(self) -> dict[str, Any]:
+        ## namespaces like candidate sets carry an index version, group by their first element ...
+        out: dict[str, dict[str, Any]] = {}
+        for ns in set(self.hits) | set(self.misses):
+            name = str(ns[0] if isinstance(ns, tuple) else ns)
+            row = out.setdefault(name, {"hits": 0, "misses": 0})
+            row["hits"] += self.hits.get(ns, 0)
+            row["misses"] += self.misses.get(ns, 0)
+        for row in out.values():
+            total = row["hits"] + row["misses"]
+            row["hit_rate"] = row["hits"] / total if total else 0.0
+        return out
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+def warm_up(
+    *,
+    entries: list[dict[str, Any]],
+    chroma_dir: str,
+    collection_name: str,
+    parse: Optional[Callable[[str], Any]] = None,
+    default_top_k: int = 5,
+    max_per_restaurant: Optional[int] = None,
+    dedup_dishes: bool = False,
+    deadline_s: Optional[float] = None,
+) -> dict[str, Any]:
+    """Replay logged queries (see `query_log.top_queries`) through parsing and `retrieve`.
+
+    Loads the embedding model, the collection and its side indexes, and fills the parse /
+    result caches for the most frequent requests. `collection_name` may be an alias or a
+    physical version that is not published yet. Without `parse` the logged filters are used.
+    Queries not started within `deadline_s` are skipped (counted in the report).
+    """
+    from .embeddings import embed_texts
+    from .retriever import retrieve
+
+    t0 = time.perf_counter()
+    report = {"queries": len(entries), "errors": 0, "skipped": 0, "embed_s": 0.0, "parse_s": 0.0, "retrieve_s": 0.0}
+    if not entries:
+        return report
+
+    embs = embed_texts([e["query"] for e in entries])
+    t1 = time.perf_counter()
+    report["embed_s"] = t1 - t0
+
+    for i, (e, emb) in enumerate(zip(entries, embs)):
+        if deadline_s is not None and time.perf_counter() - t0 > deadline_s:
+            report["skipped"] = len(entries) - i
+            break
+        try:
+            t = time.perf_counter()
+            filters = parse(e["query"]).filters if parse is not None else dict(e.get("filters") or {})
+            report["parse_s"] += time.perf_counter() - t
+
+            top_k = int(e.get("top_k") or default_top_k)
+            t = time.perf_counter()
+            ## same arguments as the app, so the result cache keys match real traffic ...
+            retrieve(
+                chroma_dir=chroma_dir,
+                collection_name=collection_name,
+                query_text=e["query"],
+                filters=filters,
+                top_k=top_k,
+                candidate_k=max(100, top_k * 20),
+                user_location=e.get("location"),
+                query_embedding=emb,
+                max_per_restaurant=max_per_restaurant,
+                dedup_dishes=dedup_dishes,
+            )
+            report["retrieve_s"] += time.perf_counter() - t
+        except Exception as exc:
+            report["errors"] += 1
+            logger.warning("warm-up query %r failed: %s", e.get("query"), exc)
+
+    report["total_s"] = time.perf_counter() - t0
+    logger.info("warm-up: %s", report)
+    return report